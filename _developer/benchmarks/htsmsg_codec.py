@@ -0,0 +1,395 @@
+# -*- coding: utf-8 -*-
+
+"""
+MediaProvider
+A device centric multimedia solution
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?mp;tvheadend
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+htsmsg_codec.py
+
+Benchmarks the HTSMSG codec with synthetic Tvheadend traffic. Run it with
+the built PAS modules including "mp_tvheadend" available in the Python path:
+
+    python _developer/benchmarks/htsmsg_codec.py --output bench.json \
+        [--baseline old_bench.json]
+
+The exit status is 1 if an operation got slower than the baseline by more
+than the allowed threshold.
+"""
+
+from argparse import ArgumentParser
+from random import Random
+from threading import Thread
+from time import perf_counter
+import gc
+import json
+import socket
+import sys
+import tracemalloc
+
+from mp.data.pvr.tvheadend.htsbin import Htsbin
+from mp.data.pvr.tvheadend.htsmsg import Htsmsg
+from mp.data.pvr.tvheadend.htsmsg_frame_parser import HtsmsgFrameParser
+from mp.data.pvr.tvheadend.lazy_htsmsg import LazyHtsmsg
+
+def get_corpora(random):
+    """
+Returns the synthetic message corpora by name.
+
+:param random: Random instance used to generate data
+
+:return: (dict) List of HTSMSG instances by corpus name
+:since:  v0.2.00
+    """
+
+    _return = { }
+
+    _return['hello_authenticate'] = [ Htsmsg({ "method": "hello",
+                                              "htspversion": 25,
+                                              "clientname": "mp.tvheadend",
+                                              "clientversion": "v0.2.00",
+                                              "seq": 0
+                                            }),
+                                      Htsmsg({ "method": "authenticate",
+                                               "username": "mp",
+                                               "digest": Htsbin(random.getrandbits(160).to_bytes(20, "little")),
+                                               "seq": 1
+                                             })
+                                    ]
+
+    _return['get_events_10k'] = [ Htsmsg({ "seq": 2,
+                                           "events": [ get_event(random, event_id) for event_id in range(10000) ]
+                                         })
+                                ]
+
+    _return['dvr_entry_add_storm'] = [ get_dvr_entry(random, dvr_id) for dvr_id in range(5000) ]
+
+    _return['file_read_1mib'] = [ Htsmsg({ "seq": 3,
+                                           "data": Htsbin(random.getrandbits(8388608).to_bytes(1048576, "little"))
+                                         })
+                                ]
+
+    return _return
+#
+
+def get_dvr_entry(random, dvr_id):
+    """
+Returns a synthetic "dvrEntryAdd" message.
+
+:param random: Random instance used to generate data
+:param dvr_id: DVR entry ID
+
+:return: (object) HTSMSG instance
+:since:  v0.2.00
+    """
+
+    start = 1500000000 + random.randint(0, 31536000)
+
+    return Htsmsg({ "method": "dvrEntryAdd",
+                    "id": dvr_id,
+                    "channel": random.randint(1, 200),
+                    "eventId": random.randint(1, 1000000),
+                    "start": start,
+                    "stop": start + random.randint(900, 10800),
+                    "startExtra": 2,
+                    "stopExtra": 10,
+                    "retention": 0,
+                    "priority": 2,
+                    "contentType": random.randint(0, 15),
+                    "title": get_text(random, 30),
+                    "subtitle": get_text(random, 60),
+                    "summary": get_text(random, 200),
+                    "description": get_text(random, 2000),
+                    "state": random.choice([ "scheduled", "recording", "completed", "missed" ]),
+                    "files": [ { "filename": "/srv/recordings/{0:d}.ts".format(dvr_id),
+                                 "size": random.randint(0, 0xffffffffff),
+                                 "start": start,
+                                 "stop": start + 3600
+                               }
+                             ]
+                  })
+#
+
+def get_event(random, event_id):
+    """
+Returns a synthetic EPG event as contained in "getEvents" responses.
+
+:param random: Random instance used to generate data
+:param event_id: EPG event ID
+
+:return: (dict) Event data
+:since:  v0.2.00
+    """
+
+    start = 1500000000 + (event_id * 1800)
+
+    return { "eventId": event_id,
+             "channelId": random.randint(1, 200),
+             "start": start,
+             "stop": start + 1800,
+             "title": get_text(random, 30),
+             "summary": get_text(random, 120),
+             "description": get_text(random, 400),
+             "contentType": random.randint(0, 15),
+             "ageRating": random.randint(0, 18),
+             "nextEventId": event_id + 1
+           }
+#
+
+def get_text(random, length):
+    """
+Returns synthetic text containing non-ASCII characters.
+
+:param random: Random instance used to generate data
+:param length: Number of characters
+
+:return: (str) Text
+:since:  v0.2.00
+    """
+
+    return "".join(random.choice("abcdefghijklmnopqrstuvwxyz äöüé") for _ in range(length))
+#
+
+def import_socket_data(frames, message_count):
+    """
+Imports the given frames with "Htsmsg.import_socket_data()" from a socket
+pair.
+
+:param frames: Encoded frames
+:param message_count: Number of messages contained
+
+:since: v0.2.00
+    """
+
+    reader_socket, writer_socket = socket.socketpair()
+
+    writer_thread = Thread(target = writer_socket.sendall, args = ( frames, ))
+    writer_thread.start()
+
+    try:
+        for _ in range(message_count): Htsmsg.import_socket_data(reader_socket)
+    finally:
+        writer_thread.join()
+
+        reader_socket.close()
+        writer_socket.close()
+    #
+#
+
+def measure(operation, data_size, message_count, repeat):
+    """
+Measures throughput and memory of the given operation.
+
+:param operation: Callable to measure
+:param data_size: Encoded bytes processed per call
+:param message_count: Messages processed per call
+:param repeat: Number of timed calls
+
+:return: (dict) Measured values
+:since:  v0.2.00
+    """
+
+    operation()
+
+    timings = [ ]
+
+    for _ in range(repeat):
+        gc.collect()
+
+        started = perf_counter()
+        operation()
+        timings.append(perf_counter() - started)
+    #
+
+    gc.collect()
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+
+    traced_start = tracemalloc.get_traced_memory()[0]
+    blocks_start = sys.getallocatedblocks()
+
+    operation()
+
+    traced_end, traced_peak = tracemalloc.get_traced_memory()
+    blocks_end = sys.getallocatedblocks()
+
+    tracemalloc.stop()
+
+    best_timing = min(timings)
+
+    return { "seconds_best": best_timing,
+             "seconds_mean": sum(timings) / len(timings),
+             "messages_per_second": message_count / best_timing,
+             "megabytes_per_second": (data_size / 1048576) / best_timing,
+             "peak_bytes": traced_peak - traced_start,
+             "retained_bytes": traced_end - traced_start,
+             "retained_blocks": blocks_end - blocks_start
+           }
+#
+
+def parse_frames(frames, lazy, chunk_size = 65536):
+    """
+Parses the given frames with the incremental frame parser in chunks as
+received from a socket.
+
+:param frames: Encoded frames
+:param lazy: True to parse into LazyHtsmsg instances
+:param chunk_size: Bytes fed per call
+
+:since: v0.2.00
+    """
+
+    frame_parser = HtsmsgFrameParser(lazy = lazy)
+    frames = memoryview(frames)
+
+    for position in range(0, len(frames), chunk_size):
+        frame_parser.feed(frames[position:position + chunk_size])
+        frame_parser.get_messages()
+    #
+#
+
+def run(repeat, seed):
+    """
+Runs all benchmarks.
+
+:param repeat: Number of timed calls per operation
+:param seed: Random seed for the corpora
+
+:return: (dict) Measured values by corpus and operation
+:since:  v0.2.00
+    """
+
+    _return = { }
+
+    for corpus_name, messages in sorted(get_corpora(Random(seed)).items()):
+        encoded_messages = [ message.export() for message in messages ]
+
+        frames = b"".join(encoded_messages)
+        data_size = len(frames)
+        message_count = len(messages)
+
+        operations = { "export": lambda: [ message.export() for message in messages ],
+                       "import_message": lambda: [ Htsmsg.import_message(message) for message in encoded_messages ],
+                       "import_message_lazy": lambda: [ LazyHtsmsg.import_message(message) for message in encoded_messages ],
+                       "import_socket_data": lambda: import_socket_data(frames, message_count),
+                       "frame_parser": lambda: parse_frames(frames, False),
+                       "frame_parser_lazy": lambda: parse_frames(frames, True)
+                     }
+
+        _return[corpus_name] = { "bytes": data_size, "messages": message_count }
+
+        for operation_name, operation in sorted(operations.items()):
+            _return[corpus_name][operation_name] = measure(operation, data_size, message_count, repeat)
+        #
+    #
+
+    return _return
+#
+
+def get_regressions(results, baseline, threshold):
+    """
+Compares the best timings of the results with the baseline given.
+
+:param results: Measured values
+:param baseline: Previously measured values
+:param threshold: Allowed slowdown as a factor (0.1 = 10%)
+
+:return: (list) Regression descriptions
+:since:  v0.2.00
+    """
+
+    _return = [ ]
+
+    for corpus_name, operations in results.items():
+        for operation_name, values in operations.items():
+            if (not isinstance(values, dict)): continue
+
+            baseline_values = baseline.get(corpus_name, { }).get(operation_name)
+            if (not isinstance(baseline_values, dict)): continue
+
+            slowdown = (values['seconds_best'] / baseline_values['seconds_best']) - 1
+
+            if (slowdown > threshold):
+                _return.append("{0}.{1}: {2:.1%} slower".format(corpus_name, operation_name, slowdown))
+            #
+        #
+    #
+
+    return _return
+#
+
+def main():
+    """
+Parses the command line arguments and runs the benchmarks.
+
+:return: (int) Exit status
+:since:  v0.2.00
+    """
+
+    argument_parser = ArgumentParser(description = "Benchmarks the HTSMSG codec with synthetic Tvheadend traffic")
+    argument_parser.add_argument("--repeat", type = int, default = 5, help = "Number of timed calls per operation")
+    argument_parser.add_argument("--seed", type = int, default = 1, help = "Random seed for the message corpora")
+    argument_parser.add_argument("--output", help = "File to write the JSON encoded results to")
+    argument_parser.add_argument("--baseline", help = "JSON encoded results to compare with")
+    argument_parser.add_argument("--threshold", type = float, default = 0.1, help = "Allowed slowdown compared to the baseline")
+
+    arguments = argument_parser.parse_args()
+
+    results = run(arguments.repeat, arguments.seed)
+    results_json = json.dumps(results, indent = 2, sort_keys = True)
+
+    if (arguments.output is None): print(results_json)
+    else:
+        with open(arguments.output, "w") as file_object: file_object.write(results_json)
+    #
+
+    for corpus_name, operations in sorted(results.items()):
+        for operation_name, values in sorted(operations.items()):
+            if (isinstance(values, dict)):
+                sys.stderr.write("{0:<20} {1:<20} {2:>12.1f} msg/s {3:>10.1f} MiB/s {4:>12d} B peak\n".format(corpus_name,
+                                                                                                      operation_name,
+                                                                                                      values['messages_per_second'],
+                                                                                                      values['megabytes_per_second'],
+                                                                                                      values['peak_bytes']
+                                                                                                     ))
+            #
+        #
+    #
+
+    _return = 0
+
+    if (arguments.baseline is not None):
+        with open(arguments.baseline, "r") as file_object: baseline = json.load(file_object)
+
+        regressions = get_regressions(results, baseline, arguments.threshold)
+
+        for regression in regressions: sys.stderr.write("Regression: {0}\n".format(regression))
+        if (len(regressions) > 0): _return = 1
+    #
+
+    return _return
+#
+
+if (__name__ == "__main__"): sys.exit(main())
@@ -32,6 +32,9 @@ https://www.direct-netware.de/redirect?licenses;gpl
 
 # pylint: disable=import-error,no-name-in-module
 
+from time import time
+import asyncio
+
 from dNG.data.binary import Binary
 from dNG.data.logging.log_line import LogLine
 from dNG.data.settings import Settings
@@ -41,8 +44,12 @@ from dNG.plugins.hook import Hook
 from dNG.runtime.io_exception import IOException
 from dNG.runtime.thread_lock import ThreadLock
 from dNG.vfs.abstract import Abstract
+from dNG.vfs.x_tvheadend.read_ahead_buffer import ReadAheadBuffer
 
-from mp.net.tvheadend.client import Client
+from mp.data.pvr.tvheadend.recording_status_index import RecordingStatusIndex
+from mp.data.pvr.tvheadend.segment_cache import SegmentCache
+from mp.net.tvheadend.client_pool import ClientPool
+from mp.net.tvheadend.file_handle_pool import FileHandlePool
 from dNG.database.nothing_matched_exception import NothingMatchedException
 
 class Object(Abstract):
@@ -67,13 +74,21 @@ Constructor __init__(TvheadendFile)
 
         Abstract.__init__(self)
 
+        self.client = None
+        """
+Tvheadend client of the streaming lane used for this object
+        """
         self.dvr_id = None
         """
 Tvheadend DVR entry ID
         """
-        self.handle_id = None
+        self.handle = None
+        """
+Pooled Tvheadend file handle
         """
-File ID of the opened Tvheadend file
+        self.handle_future = None
+        """
+Future of the file handle acquired in the background on open
         """
         self.handle_position = 0
         """
@@ -82,6 +97,18 @@ File handle position calculated
         self._lock = ThreadLock()
         """
 Thread safety lock
+        """
+        self.read_ahead_buffer = None
+        """
+Read-ahead buffer keeping "fileRead" requests in flight
+        """
+        self.segment_cache = None
+        """
+Local segment cache used for finished recordings
+        """
+        self.tail_follow = False
+        """
+True to wait for data of recordings in progress instead of returning EOF
         """
         self.vfs_type = None
         """
@@ -99,16 +126,18 @@ python.org: Flush and close this stream.
 :since: v0.1.00
         """
 
-        client = Client.get_instance()
-
         try:
-            if (self.handle_id is not None
-                and client.is_active()
-               ): client.fileClose(id = self.handle_id)
+            if (self.handle is not None): FileHandlePool.get_instance().release(self.handle)
+            elif (self.handle_future is not None): self.handle_future.add_done_callback(Object._release_handle_future)
         except Exception as handled_exception: LogLine.error(handled_exception, context = "mp_tvheadend")
         finally:
+            self.client = None
             self.dvr_id = None
-            self.handle_id = None
+            self.handle = None
+            self.handle_future = None
+            self.read_ahead_buffer = None
+            self.segment_cache = None
+            self.tail_follow = False
             self.vfs_type = None
         #
     #
@@ -116,7 +145,8 @@ python.org: Flush and close this stream.
     def _ensure_handle_opened(self):
         """
 Checks the Tvheadend recording status and an opened file handle. This method
-only requests one if the recording status indicates that it is available.
+only acquires one from the file handle pool if the recording status
+indicates that it is available.
 
 :return: (str) Implementing scheme name
 :since:  v0.1.00
@@ -124,19 +154,70 @@ only requests one if the recording status indicates that it is available.
 
         if (self.vfs_type is None): raise IOException("VFS object not opened")
 
-        if (self.handle_id is None and self._supports_handle()):
-            client = Client.get_instance()
-            if (not client.is_active()): raise IOException("Tvheadend client is not listening")
+        if (self.handle is None):
+            recording_status = self._get_recording_status()
+
+            if (recording_status in ( MpEntryPvrRecording.RECORDING_STATUS_FINISHED,
+                                      MpEntryPvrRecording.RECORDING_STATUS_RECORDING
+                                    )
+               ):
+                client = self._get_client()
+                if (not client.is_active()): raise IOException("Tvheadend client is not listening")
+
+                with self._lock:
+                    # Thread safety
+                    if (self.handle is None):
+                        if (self.handle_future is not None):
+                            try: self.handle = self.handle_future.result(client.timeout)
+                            except Exception as handled_exception:
+                                self.handle_future.add_done_callback(Object._release_handle_future)
+                                LogLine.error(handled_exception, context = "mp_tvheadend")
+                            #
+
+                            self.handle_future = None
+                        #
+
+                        if (self.handle is None): self.handle = FileHandlePool.get_instance().acquire(self.dvr_id)
 
-            with self._lock:
-                # Thread safety
-                if (self.handle_id is None):
-                    self.handle_id = client.fileOpen(file = "/dvrfile/{0}".format(self.dvr_id))['id']
+                        self.handle.set_immutable(recording_status == MpEntryPvrRecording.RECORDING_STATUS_FINISHED)
+
+                        self.client = self.handle.get_client()
+
+                        if (recording_status == MpEntryPvrRecording.RECORDING_STATUS_FINISHED
+                            and SegmentCache.is_enabled()
+                           ): self.segment_cache = SegmentCache.get_instance()
+                    #
                 #
             #
         #
     #
 
+    async def _ensure_handle_opened_async(self):
+        """
+Checks the Tvheadend recording status and an opened file handle without
+blocking the running asyncio event loop. Acquiring a handle is delegated
+to the default executor.
+
+:since: v0.2.00
+        """
+
+        if (self.handle is None): await asyncio.get_running_loop().run_in_executor(None, self._ensure_handle_opened)
+    #
+
+    def _get_client(self):
+        """
+Returns the Tvheadend client used for this object. File handles are only
+valid for the connection they have been opened with and the client of an
+acquired handle is used therefore.
+
+:return: (object) Tvheadend client
+:since:  v0.2.00
+        """
+
+        if (self.client is None): self.client = ClientPool.get_instance().get_client(ClientPool.LANE_STREAM)
+        return self.client
+    #
+
     def get_implementing_scheme(self):
         """
 Returns the implementing scheme name.
@@ -158,7 +239,7 @@ Returns the name of this VFS object.
 
         _return = None
 
-        client = Client.get_instance()
+        client = self._get_client()
         if (not client.is_active()): raise IOException("Tvheadend client is not listening")
 
         if (self.vfs_type == Object.TYPE_DIRECTORY): _return = client.get_server_name()
@@ -168,6 +249,59 @@ Returns the name of this VFS object.
         return _return
     #
 
+    def _get_read_ahead_buffer(self):
+        """
+Returns the read-ahead buffer for the opened file handle. It is created on
+first use if "mp_tvheadend_vfs_read_ahead_requests" is greater than 0.
+
+:return: (object) Read-ahead buffer; None if disabled
+:since:  v0.2.00
+        """
+
+        if (self.read_ahead_buffer is None):
+            requests = int(Settings.get("mp_tvheadend_vfs_read_ahead_requests", 2))
+
+            if (requests > 0):
+                with self._lock:
+                    # Thread safety
+                    if (self.read_ahead_buffer is None):
+                        self.read_ahead_buffer = ReadAheadBuffer(self.handle,
+                                                                 self.handle_position,
+                                                                 requests
+                                                                )
+                    #
+                #
+            #
+        #
+
+        return self.read_ahead_buffer
+    #
+
+    def _get_recording_status(self):
+        """
+Returns the recording status of the Tvheadend DVR entry. The database is
+only queried if the recording status index has not been synchronized yet.
+
+:return: (int) Recording status; None if unknown
+:since:  v0.2.00
+        """
+
+        recording_status_index = RecordingStatusIndex.get_instance()
+
+        if (self.dvr_id in recording_status_index): _return = recording_status_index.get(self.dvr_id)
+        elif (recording_status_index.is_synchronized()): _return = None
+        else:
+            with Connection.get_instance():
+                try:
+                    resource = MpEntryPvrRecording.load_resource(self.get_url())
+                    _return = resource.get_data_attributes("recording_status")['recording_status']
+                except NothingMatchedException: _return = None
+            #
+        #
+
+        return _return
+    #
+
     def get_size(self):
         """
 Returns the size in bytes.
@@ -178,13 +312,13 @@ Returns the size in bytes.
 
         _return = None
 
-        client = Client.get_instance()
+        client = self._get_client()
         if (not client.is_active()): raise IOException("Tvheadend client is not listening")
 
         if (self.vfs_type == Object.TYPE_DIRECTORY): _return = 0
         elif (self.vfs_type == Object.TYPE_FILE):
             self._ensure_handle_opened()
-            _return = (0 if (self.handle_id is None) else client.fileStat(id = self.handle_id)['size'])
+            _return = (0 if (self.handle is None) else self.handle.get_stat()['size'])
         else: raise IOException("VFS object not opened")
 
         return _return
@@ -211,7 +345,7 @@ Returns the UNIX timestamp this object was updated.
 
         _return = None
 
-        client = Client.get_instance()
+        client = self._get_client()
         if (not client.is_active()): raise IOException("Tvheadend client is not listening")
 
         if (self.vfs_type == Object.TYPE_DIRECTORY): _return = Hook.call("dNG.pas.Status.getTimeStarted")
@@ -219,8 +353,8 @@ Returns the UNIX timestamp this object was updated.
             self._ensure_handle_opened()
 
             _return = (Hook.call("dNG.pas.Status.getTimeStarted")
-                       if (self.handle_id is None) else
-                       client.fileStat(id = self.handle_id)['mtime']
+                       if (self.handle is None) else
+                       self.handle.get_stat()['mtime']
                       )
         else: raise IOException("VFS object not opened")
 
@@ -258,14 +392,24 @@ Returns the URL of this VFS object.
 
     def is_eof(self):
         """
-Checks if the pointer is at EOF.
+Checks if the pointer is at EOF. Recordings in progress never report EOF
+while tail-follow is enabled.
 
 :return: (bool) True on success
 :since:  v0.1.00
         """
 
         self._ensure_handle_opened()
-        return (self.handle_id is None or self.handle_position >= self.get_size())
+
+        _return = (self.handle is None)
+
+        if ((not _return)
+            and ((not self.tail_follow)
+                 or self._get_recording_status() != MpEntryPvrRecording.RECORDING_STATUS_RECORDING
+                )
+           ): _return = (self.handle_position >= self.get_size())
+
+        return _return
     #
 
     def is_valid(self):
@@ -276,11 +420,11 @@ Returns true if the object is available.
 :since:  v0.1.00
         """
 
-        _return = (self.vfs_type is not None and Client.get_instance().is_active())
+        _return = (self.vfs_type is not None and self._get_client().is_active())
 
         if (self.vfs_type == Object.TYPE_FILE):
             self._ensure_handle_opened()
-            _return = (self.handle_id is not None)
+            _return = (self.handle is not None)
         #
 
         return _return
@@ -296,7 +440,7 @@ Opens a VFS object. The handle is set at the beginning of the object.
 :since: v0.1.00
         """
 
-        client = Client.get_instance()
+        client = self._get_client()
         if (not client.is_active()): raise IOException("Tvheadend client is not listening")
 
         vfs_url = Binary.str(vfs_url)
@@ -306,7 +450,24 @@ Opens a VFS object. The handle is set at the beginning of the object.
         else:
             self.dvr_id = dvr_id
             self.handle_position = 0
+            self.tail_follow = Settings.get("mp_tvheadend_vfs_tail_follow", False)
             self.vfs_type = Object.TYPE_FILE
+
+            if (Settings.get("mp_tvheadend_vfs_prefetch_on_open", False)): self._prefetch()
+        #
+    #
+
+    def _prefetch(self):
+        """
+Acquires the file handle of a finished recording in the background and
+prefetches its "fileStat" result and first chunk. The recording status is
+only looked up in the recording status index.
+
+:since: v0.2.00
+        """
+
+        if (RecordingStatusIndex.get_instance().get(self.dvr_id) == MpEntryPvrRecording.RECORDING_STATUS_FINISHED):
+            self.handle_future = FileHandlePool.get_instance().acquire_async(self.dvr_id, True)
         #
     #
 
@@ -327,15 +488,17 @@ python.org: Read up to n bytes from the object and return them.
 
         self._ensure_handle_opened()
 
-        if (self.handle_id is not None):
-            if (n is None or n < 1): n = int(Settings.get("pas_global_io_chunk_size_local_network", 1048576))
+        if (self.handle is not None):
+            client = self._get_client()
 
-            client = Client.get_instance()
+            if (n is None or n < 1): n = client.get_chunk_size_controller().get_chunk_size()
 
-            _return = (client.fileRead(id = self.handle_id, size = n)['data']
-                       if (client.is_active()) else
-                       None
-                      )
+            if (client.is_active()):
+                _return = (self._read_tail(n, timeout)
+                           if (self.tail_follow and (not self.handle.immutable)) else
+                           self._read_available(n)
+                          )
+            #
 
             if (_return is not None): self.handle_position += len(_return)
         #
@@ -343,6 +506,308 @@ python.org: Read up to n bytes from the object and return them.
         return _return
     #
 
+    def _read_available(self, n):
+        """
+Reads up to n bytes available at the current position.
+
+:param n: How many bytes to read
+
+:return: (bytes) Data; empty if EOF
+:since:  v0.2.00
+        """
+
+        if (self.segment_cache is not None): _return = self._read_from_segment_cache(self.handle_position, n)
+        elif (self._get_read_ahead_buffer() is None):
+            chunk_size_controller = self._get_client().get_chunk_size_controller()
+
+            time_sent = time()
+            _return = self.handle.read(self.handle_position, n)
+
+            if (len(_return) == n): chunk_size_controller.record(n, time() - time_sent)
+        else: _return = self.read_ahead_buffer.read(n)
+
+        return _return
+    #
+
+    async def read_async(self, n = 0):
+        """
+Reads up to n bytes from the object without blocking the running asyncio
+event loop while waiting for the Tvheadend server.
+
+:param n: How many bytes to read from the current position (0 means until
+          EOF)
+
+:return: (bytes) Data; None if EOF
+:since:  v0.2.00
+        """
+
+        _return = None
+        if (self.vfs_type != Object.TYPE_FILE): raise IOException("VFS object not opened")
+
+        await self._ensure_handle_opened_async()
+
+        if (self.handle is not None):
+            client = self._get_client()
+            loop = asyncio.get_running_loop()
+
+            if (n is None or n < 1): n = client.get_chunk_size_controller().get_chunk_size()
+
+            # Checking the client may reconnect and is therefore delegated to the
+            # default executor as well as sending the request.
+            if (not (await loop.run_in_executor(None, client.is_active))): _return = None
+            elif (self.segment_cache is not None): _return = await self._read_from_segment_cache_async(self.handle_position, n)
+            else:
+                response_future = await loop.run_in_executor(None, self.handle.call_read_async, self.handle_position, n)
+                _return = (await client.get_response_async(response_future))['data']
+            #
+
+            if (_return is not None):
+                self.handle_position += len(_return)
+                if (self.read_ahead_buffer is not None): self.read_ahead_buffer.reset(self.handle_position)
+            #
+        #
+
+        return _return
+    #
+
+    def _read_from_segment_cache(self, offset, n):
+        """
+Reads up to n bytes from the local segment cache. Missing segments are
+requested from the Tvheadend server and cached if complete.
+
+:param offset: Offset to read from
+:param n: How many bytes to read
+
+:return: (bytes) Data; empty if EOF
+:since:  v0.2.00
+        """
+
+        _return = [ ]
+        file_size = self.handle.get_stat()['size']
+        size = 0
+
+        while (size < n):
+            position = offset + size
+            if (position >= file_size): break
+
+            data = self.segment_cache.get(self.dvr_id, position, n - size, file_size)
+
+            if (data is None):
+                segment_offset, segment_size = self.segment_cache.get_segment_range(position)
+                segment_data = self._read_pipelined(segment_offset, segment_size)
+
+                self.segment_cache.put(self.dvr_id, segment_offset, segment_data, file_size)
+
+                position -= segment_offset
+                data = segment_data[position:position + n - size]
+            #
+
+            if (len(data) < 1): break
+
+            _return.append(data)
+            size += len(data)
+        #
+
+        return Binary.BYTES_TYPE().join(_return)
+    #
+
+    async def _read_from_segment_cache_async(self, offset, n):
+        """
+Reads up to n bytes from the local segment cache. Missing segments are
+requested from the Tvheadend server without blocking the running asyncio
+event loop and cached if complete.
+
+:param offset: Offset to read from
+:param n: How many bytes to read
+
+:return: (bytes) Data; empty if EOF
+:since:  v0.2.00
+        """
+
+        _return = [ ]
+        loop = asyncio.get_running_loop()
+        file_size = (await loop.run_in_executor(None, self.handle.get_stat))['size']
+        size = 0
+
+        while (size < n):
+            position = offset + size
+            if (position >= file_size): break
+
+            data = self.segment_cache.get(self.dvr_id, position, n - size, file_size)
+
+            if (data is None):
+                segment_offset, segment_size = self.segment_cache.get_segment_range(position)
+                segment_data = await self._read_pipelined_async(segment_offset, segment_size)
+
+                await loop.run_in_executor(None, self.segment_cache.put, self.dvr_id, segment_offset, segment_data, file_size)
+
+                position -= segment_offset
+                data = segment_data[position:position + n - size]
+            #
+
+            if (len(data) < 1): break
+
+            _return.append(data)
+            size += len(data)
+        #
+
+        return Binary.BYTES_TYPE().join(_return)
+    #
+
+    def _read_pipelined(self, offset, size):
+        """
+Reads the given byte range with pipelined "fileRead" requests.
+
+:param offset: Offset to read from
+:param size: Bytes to read
+
+:return: (bytes) Data; shorter than requested at the end of the file
+:since:  v0.2.00
+        """
+
+        _return = [ ]
+
+        client = self._get_client()
+
+        for request_size, response_future in self._request_pipelined(offset, size):
+            data = client.get_response(response_future)['data']
+            _return.append(data)
+
+            if (len(data) < request_size): break
+        #
+
+        return Binary.BYTES_TYPE().join(_return)
+    #
+
+    async def _read_pipelined_async(self, offset, size):
+        """
+Reads the given byte range with pipelined "fileRead" requests without
+blocking the running asyncio event loop.
+
+:param offset: Offset to read from
+:param size: Bytes to read
+
+:return: (bytes) Data; shorter than requested at the end of the file
+:since:  v0.2.00
+        """
+
+        _return = [ ]
+
+        client = self._get_client()
+
+        # Sending the requests may reconnect the client
+        response_futures = await asyncio.get_running_loop().run_in_executor(None, self._request_pipelined, offset, size)
+
+        for request_size, response_future in response_futures:
+            data = (await client.get_response_async(response_future))['data']
+            _return.append(data)
+
+            if (len(data) < request_size): break
+        #
+
+        return Binary.BYTES_TYPE().join(_return)
+    #
+
+    def _read_tail(self, n, timeout = -1):
+        """
+Reads up to n bytes of a recording in progress. If the current end has
+been reached the thread is parked until an event for the DVR entry is
+received or an exponential backoff timer expires. EOF is only returned
+after the recording has been completed.
+
+:param n: How many bytes to read
+:param timeout: Maximum number of seconds to wait for data; negative to
+                wait until the recording has been completed
+
+:return: (bytes) Data; empty if EOF or timed out
+:since:  v0.2.00
+        """
+
+        recording_status_index = RecordingStatusIndex.get_instance()
+
+        backoff = float(Settings.get("mp_tvheadend_vfs_tail_follow_backoff_min", 0.5))
+        backoff_max = float(Settings.get("mp_tvheadend_vfs_tail_follow_backoff_max", 8))
+        timeout_time = (None if (timeout is None or timeout < 0) else time() + timeout)
+
+        while (True):
+            version = recording_status_index.get_version(self.dvr_id)
+
+            if (self._get_recording_status() != MpEntryPvrRecording.RECORDING_STATUS_RECORDING):
+                # The file is complete and the remaining data can be read.
+                self.handle.set_immutable()
+                _return = self._read_available(n)
+
+                break
+            #
+
+            _return = self._read_available(n)
+            if (len(_return) > 0): break
+
+            wait_timeout = backoff
+
+            if (timeout_time is not None):
+                wait_timeout = min(wait_timeout, timeout_time - time())
+                if (wait_timeout <= 0): break
+            #
+
+            if (not recording_status_index.wait(self.dvr_id, version, wait_timeout)):
+                backoff = min(backoff * 2, backoff_max)
+            #
+        #
+
+        return _return
+    #
+
+    def read_range(self, offset, size):
+        """
+Reads up to the given number of bytes at the given offset without changing
+the stream position. Requests are pipelined with explicit offsets on the
+pooled handle and are not serialized with other ranges read concurrently.
+
+:param offset: Offset to read from
+:param size: How many bytes to read
+
+:return: (bytes) Data; None if the Tvheadend client is not listening
+:since:  v0.2.00
+        """
+
+        _return = None
+        if (self.vfs_type != Object.TYPE_FILE): raise IOException("VFS object not opened")
+
+        self._ensure_handle_opened()
+
+        if (self.handle is not None and self._get_client().is_active()):
+            _return = (self._read_pipelined(offset, size)
+                       if (self.segment_cache is None) else
+                       self._read_from_segment_cache(offset, size)
+                      )
+        #
+
+        return _return
+    #
+
+    def _request_pipelined(self, offset, size):
+        """
+Sends pipelined "fileRead" requests for the given byte range in chunks of
+the current chunk size.
+
+:param offset: Offset to read from
+:param size: Bytes to read
+
+:return: (list) Requested size and response future for each chunk
+:since:  v0.2.00
+        """
+
+        chunk_size = self._get_client().get_chunk_size_controller().get_chunk_size()
+        end_position = offset + size
+
+        return [ ( min(chunk_size, end_position - position),
+                   self.handle.call_read_async(position, min(chunk_size, end_position - position))
+                 )
+                 for position in range(offset, end_position, chunk_size)
+               ]
+    #
+
     def seek(self, offset):
         """
 python.org: Change the stream position to the given byte offset.
@@ -357,18 +822,47 @@ python.org: Change the stream position to the given byte offset.
 
         self._ensure_handle_opened()
 
-        if (self.handle_id is not None):
-            client = Client.get_instance()
-
-            self.handle_position = client.fileSeek(id = self.handle_id,
-                                                   offset = offset,
-                                                   whence = "SEEK_SET"
-                                                  )['offset']
+        if (self.handle is not None):
+            # The position is tracked per object. The pooled handle only
+            # issues "fileSeek" if a synchronous read requires it.
+            self.handle_position = offset
+            if (self.read_ahead_buffer is not None): self.read_ahead_buffer.reset(self.handle_position)
         #
 
         return self.handle_position
     #
 
+    def set_tail_follow(self, tail_follow):
+        """
+Sets if reading a recording in progress should wait for new data at the
+current end of the file instead of returning EOF.
+
+:param tail_follow: True to follow the recording until it has been
+                    completed
+
+:since: v0.2.00
+        """
+
+        self.tail_follow = tail_follow
+    #
+
+    async def seek_async(self, offset):
+        """
+Changes the stream position to the given byte offset without blocking the
+running asyncio event loop.
+
+:param offset: Seek to the given offset
+
+:return: (int) Return the new absolute position.
+:since:  v0.2.00
+        """
+
+        if (self.vfs_type != Object.TYPE_FILE): raise IOException("VFS object not opened")
+
+        await self._ensure_handle_opened_async()
+        return self.seek(offset)
+    #
+
     def _supports_handle(self):
         """
 Returns false if an handle for the VFS object can not be obtained.
@@ -377,19 +871,12 @@ Returns false if an handle for the VFS object can not be obtained.
 :since:  v0.2.00
         """
 
-        _return = (self.handle_id is not None)
+        _return = (self.handle is not None)
 
         if ((not _return) and self.vfs_type == Object.TYPE_FILE):
-            with Connection.get_instance():
-                try:
-                    resource = MpEntryPvrRecording.load_resource(self.get_url())
-                    resource_recording_status = resource.get_data_attributes("recording_status")['recording_status']
-                except NothingMatchedException: resource_recording_status = None
-            #
-
-            _return = (resource_recording_status in ( MpEntryPvrRecording.RECORDING_STATUS_FINISHED,
-                                                      MpEntryPvrRecording.RECORDING_STATUS_RECORDING
-                                                    )
+            _return = (self._get_recording_status() in ( MpEntryPvrRecording.RECORDING_STATUS_FINISHED,
+                                                         MpEntryPvrRecording.RECORDING_STATUS_RECORDING
+                                                       )
                       )
         #
 
@@ -407,4 +894,19 @@ python.org: Return the current stream position as an opaque number.
         if (self.vfs_type != Object.TYPE_FILE): raise IOException("VFS object not opened")
         return self.handle_position
     #
+
+    @staticmethod
+    def _release_handle_future(handle_future):
+        """
+Releases the file handle of a future not waited for.
+
+:param handle_future: Completed future of a file handle
+
+:since: v0.2.00
+        """
+
+        if ((not handle_future.cancelled()) and handle_future.exception() is None):
+            FileHandlePool.get_instance().release(handle_future.result())
+        #
+    #
 #
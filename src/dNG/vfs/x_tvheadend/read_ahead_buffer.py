@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+
+"""
+MediaProvider
+A device centric multimedia solution
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?mp;tvheadend
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+#echo(mpTvheadendVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from collections import deque
+from functools import partial
+from time import time
+
+from dNG.data.binary import Binary
+
+class ReadAheadBuffer(object):
+    """
+Keeps a configurable number of "fileRead" requests for an opened Tvheadend
+file in flight and serves reads from the received chunks.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    mp
+:subpackage: tvheadend
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;gpl
+             GNU General Public License 2
+    """
+
+    def __init__(self, handle, position, requests, chunk_size = None):
+        """
+Constructor __init__(ReadAheadBuffer)
+
+:param handle: Tvheadend file handle
+:param position: Position to start reading at
+:param requests: Number of "fileRead" requests kept in flight
+:param chunk_size: Bytes requested per "fileRead" call; None to use the
+                   adaptive chunk size controller of the client
+
+:since: v0.2.00
+        """
+
+        self.chunk_size = chunk_size
+        """
+Fixed bytes requested per "fileRead" call
+        """
+        self.chunk_size_controller = (handle.get_client().get_chunk_size_controller() if (chunk_size is None) else None)
+        """
+Adaptive chunk size controller of the client
+        """
+        self.client = handle.get_client()
+        """
+Tvheadend client the file has been opened with
+        """
+        self.data = None
+        """
+memoryview of the received chunk currently served
+        """
+        self.data_position = 0
+        """
+Position within the received chunk currently served
+        """
+        self.handle = handle
+        """
+Tvheadend file handle
+        """
+        self.last_response_time = 0
+        """
+UNIX timestamp the last response consumed has been received
+        """
+        self.pending = deque()
+        """
+Requests in flight as [ offset, size, future, time sent, time received ]
+        """
+        self.request_position = position
+        """
+Offset of the next "fileRead" request
+        """
+        self.requests = max(1, requests)
+        """
+Number of "fileRead" requests kept in flight
+        """
+    #
+
+    def _fill(self):
+        """
+Issues "fileRead" requests until the configured number is in flight. A
+request prefetched on open is used for the first position if available.
+
+:since: v0.2.00
+        """
+
+        if (len(self.pending) < 1):
+            prefetched_read = self.handle.pop_prefetched_read(self.request_position)
+
+            if (prefetched_read is not None):
+                chunk_size, response_future = prefetched_read
+
+                # The latency of a prefetched request is not measured.
+                self.pending.append([ self.request_position, chunk_size, response_future, None, None ])
+                self.request_position += chunk_size
+            #
+        #
+
+        while (len(self.pending) < self.requests):
+            chunk_size = (self.chunk_size
+                          if (self.chunk_size_controller is None) else
+                          self.chunk_size_controller.get_chunk_size()
+                         )
+
+            request = [ self.request_position, chunk_size, None, time(), None ]
+
+            request[2] = self.handle.call_read_async(self.request_position, chunk_size)
+
+            request[2].add_done_callback(partial(ReadAheadBuffer._set_request_received, request))
+
+            self.pending.append(request)
+            self.request_position += chunk_size
+        #
+    #
+
+    def read(self, n):
+        """
+Reads up to n bytes from the buffer. Fewer bytes are returned if the end
+of the file currently available has been reached.
+
+:param n: How many bytes to read
+
+:return: (bytes) Data; empty if EOF
+:since:  v0.2.00
+        """
+
+        _return = [ ]
+        size = 0
+
+        while (size < n):
+            if (self.data is None or self.data_position >= len(self.data)):
+                if (not self._receive()): break
+            #
+
+            data_size = min(n - size, len(self.data) - self.data_position)
+
+            _return.append(self.data[self.data_position:self.data_position + data_size])
+            self.data_position += data_size
+            size += data_size
+        #
+
+        return (_return[0].tobytes() if (len(_return) == 1) else Binary.BYTES_TYPE().join(_return))
+    #
+
+    def _receive(self):
+        """
+Waits for the oldest "fileRead" request in flight and makes its data the
+current chunk.
+
+:return: (bool) False if no data is available at the current position
+:since:  v0.2.00
+        """
+
+        self._fill()
+
+        offset, size, response_future, time_sent, time_received = self.pending.popleft()
+        data = self.client.get_response(response_future)['data']
+
+        if (self.chunk_size_controller is not None
+            and time_sent is not None
+            and len(data) == size
+           ):
+            if (time_received is None): time_received = time()
+
+            self.chunk_size_controller.record(size,
+                                              time_received - time_sent,
+                                              time_received - max(time_sent, self.last_response_time)
+                                             )
+
+            self.last_response_time = time_received
+        #
+
+        self.data = memoryview(data)
+        self.data_position = 0
+
+        if (len(data) < size):
+            # Short read at the current end of the file: Requests for later
+            # offsets are discarded as the file may still be growing.
+            self.pending.clear()
+            self.request_position = offset + len(data)
+        #
+
+        return (len(data) > 0)
+    #
+
+    def reset(self, position):
+        """
+Discards all buffered data and requests in flight. Reading continues at
+the given position.
+
+:param position: New position
+
+:since: v0.2.00
+        """
+
+        self.data = None
+        self.data_position = 0
+        self.pending.clear()
+        self.request_position = position
+    #
+
+    @staticmethod
+    def _set_request_received(request, response_future):
+        """
+Called when the response of a "fileRead" request has been received.
+
+:param request: Request list to update
+:param response_future: Completed response future
+
+:since: v0.2.00
+        """
+
+        request[4] = time()
+    #
+#
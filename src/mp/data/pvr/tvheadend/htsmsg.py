@@ -30,7 +30,7 @@ https://www.direct-netware.de/redirect?licenses;gpl
 #echo(__FILEPATH__)#
 """
 
-from struct import pack, unpack
+from struct import Struct
 
 from dNG.data.binary import Binary
 from dNG.data.settings import Settings
@@ -95,6 +95,27 @@ Binary string
 List type
     """
 
+    _FIELD_DECODERS = { }
+    """
+HTSMSG field decoders by type ID
+    """
+    _FIELD_ENCODERS = { }
+    """
+HTSMSG field encoders by Python type
+    """
+    _HEADER_STRUCT = Struct("!BBI")
+    """
+Precompiled HTSMSG field header codec
+    """
+    _S64_STRUCTS = { 1: Struct("<B"), 2: Struct("<H"), 4: Struct("<I"), 8: Struct("<Q") }
+    """
+Precompiled little-endian codecs for S64 values of common sizes
+    """
+    _SIZE_STRUCT = Struct("!I")
+    """
+Precompiled message and field value length codec
+    """
+
     def export(self):
         """
 Exports a HTSMSG encoded message from this dict.
@@ -103,53 +124,59 @@ Exports a HTSMSG encoded message from this dict.
 :since:  v0.1.00
         """
 
-        header_size = Htsmsg.TYPE_ID_SIZE + Htsmsg.FIELD_NAME_LENGTH_SIZE + Htsmsg.FIELD_VALUE_LENGTH_SIZE
+        _return = bytearray(Htsmsg.MESSAGE_LENGTH_SIZE)
 
-        data = Htsmsg._encode(self)[header_size:]
-        return pack("!I", len(data)) + data
+        for data_key in self: Htsmsg._encode(_return, self[data_key], data_key)
+        Htsmsg._SIZE_STRUCT.pack_into(_return, 0, len(_return) - Htsmsg.MESSAGE_LENGTH_SIZE)
+
+        return Binary.BYTES_TYPE(_return)
     #
 
     @staticmethod
-    def _decode(data, parent_element):
+    def _decode(data, parent_element, data_position = 0, data_end = None):
         """
-Decodes binary HTSMSG field data.
+Decodes binary HTSMSG field data. The given data is walked by offset to
+avoid copying nested maps and lists. Only leaf values are materialized.
 
-:param data: HTSMSG field data
+:param data: memoryview of the HTSMSG data
+:param parent_element: Element (dict or list) to add decoded fields to
+:param data_position: Offset of the first field to decode
+:param data_end: Offset after the last field to decode
 
 :return: (mixed) Field content
 :since:  v0.1.00
         """
 
         _return = parent_element
-        parent_element_type = type(parent_element)
+        is_parent_element_dict = isinstance(parent_element, dict)
+
+        if (data_end is None): data_end = len(data)
 
-        data_position = 0
-        data_size = len(data)
-        header_size = Htsmsg.TYPE_ID_SIZE + Htsmsg.FIELD_NAME_LENGTH_SIZE + Htsmsg.FIELD_VALUE_LENGTH_SIZE
+        field_decoders = Htsmsg._FIELD_DECODERS
+        header_size = Htsmsg._HEADER_STRUCT.size
+        header_unpack_from = Htsmsg._HEADER_STRUCT.unpack_from
 
-        if (data_size > 0 and data_size < header_size): raise ValueException("HTSMSG is invalid")
+        if (data_end > data_position and (data_end - data_position) < header_size): raise ValueException("HTSMSG is invalid")
 
-        while ((data_size - data_position) > header_size):
-            header_data = unpack("!BBI", data[data_position:data_position + header_size])
-            field_size = header_size + header_data[1] + header_data[2]
-            if (field_size > data_size): raise IOException("Malformed HTSMSG field")
+        while ((data_end - data_position) >= header_size):
+            field_type, field_name_size, field_value_size = header_unpack_from(data, data_position)
 
-            field = data[data_position + header_size:data_position + field_size]
-            data_position += field_size
+            field_name_position = data_position + header_size
+            field_value_position = field_name_position + field_name_size
+            data_position = field_value_position + field_value_size
 
-            if (header_data[0] == Htsmsg.TYPE_BIN): field_value = Htsbin(field[header_data[1]:])
-            elif (header_data[0] == Htsmsg.TYPE_LIST): field_value = Htsmsg._decode(field[header_data[1]:], [ ])
-            elif (header_data[0] == Htsmsg.TYPE_S64):
-                field_value = unpack("!Q", field[header_data[1]:][::-1].rjust(8, Htsmsg.BINARY_NULL_BYTE))[0]
-                if (field_value == 0xffffffffffffffff): field_value = -1
-            elif (header_data[0] == Htsmsg.TYPE_STR): field_value = Binary.str(field[header_data[1]:])
-            elif (header_data[0] == Htsmsg.TYPE_MAP): field_value = Htsmsg._decode(field[header_data[1]:], { })
+            if (data_position > data_end): raise IOException("Malformed HTSMSG field")
 
-            if (parent_element_type is dict):
-                if (header_data[1] < 1): raise IOException("Malformed HTSMSG field name")
-                field_name = Binary.str(field[:header_data[1]])
+            field_decoder = field_decoders.get(field_type)
+            if (field_decoder is None): continue
+
+            field_value = field_decoder(data, field_value_position, data_position)
+
+            if (is_parent_element_dict):
+                if (field_name_size < 1): raise IOException("Malformed HTSMSG field name")
+                field_name = Binary.str(data[field_name_position:field_value_position].tobytes())
                 _return[field_name] = field_value
-            elif (parent_element_type is list): _return.append(field_value)
+            elif (type(parent_element) is list): _return.append(field_value)
             else: _return = field_value
         #
 
@@ -157,69 +184,257 @@ Decodes binary HTSMSG field data.
     #
 
     @staticmethod
-    def _encode(data, field_name = None):
+    def _decode_bin(data, data_position, data_end):
         """
-Decodes binary HTSMSG field data.
+Decodes a binary HTSMSG field value.
 
-:param data: HTSMSG field data
+:param data: memoryview of the HTSMSG data
+:param data_position: Offset of the field value
+:param data_end: Offset after the field value
 
-:return: (mixed) Field content
-:since:  v0.1.00
+:return: (object) Htsbin instance
+:since:  v0.2.00
         """
 
-        if (isinstance(data, dict)):
-            field_value = Binary.BYTES_TYPE()
+        return Htsbin(data[data_position:data_end].tobytes())
+    #
 
-            for data_key in data:
-                field_value += Htsmsg._encode(data[data_key], field_name = data_key)
-            #
+    @staticmethod
+    def _decode_list(data, data_position, data_end):
+        """
+Decodes a list HTSMSG field value.
+
+:param data: memoryview of the HTSMSG data
+:param data_position: Offset of the field value
+:param data_end: Offset after the field value
+
+:return: (list) List of decoded values
+:since:  v0.2.00
+        """
+
+        return Htsmsg._decode(data, [ ], data_position, data_end)
+    #
+
+    @staticmethod
+    def _decode_map(data, data_position, data_end):
+        """
+Decodes a map HTSMSG field value.
 
-            _return = Htsmsg._encode_field(Htsmsg.TYPE_MAP,
-                                           field_name,
-                                           field_value
-                                          )
-        elif (isinstance(data, Htsbin)): _return = Htsmsg._encode_field(Htsmsg.TYPE_BIN, field_name, data)
-        elif (isinstance(data, list)):
-            field_value = Binary.BYTES_TYPE()
-            for entry in data: field_value += Htsmsg._encode(entry)
-            _return = Htsmsg._encode_field(Htsmsg.TYPE_LIST, field_name, field_value)
-        else:
-            if (type(data) in ( int, float )):
-                if (data < -1 or data > 0xfffffffffffffffe): raise ValueException("Numeric value is not supported by HTSMSG")
-                if (data == -1): data = 0xffffffffffffffff
-
-                if (data == 0): data = "\x00"
-                else:
-                    data = pack("!Q", data)
-                    data = data.lstrip(Htsmsg.BINARY_NULL_BYTE)[::-1]
-                #
-
-                _return = Htsmsg._encode_field(Htsmsg.TYPE_S64, field_name, data)
-            elif (isinstance(data, str)): _return = Htsmsg._encode_field(Htsmsg.TYPE_STR, field_name, Binary.bytes(data))
+:param data: memoryview of the HTSMSG data
+:param data_position: Offset of the field value
+:param data_end: Offset after the field value
+
+:return: (dict) Dict of decoded fields
+:since:  v0.2.00
+        """
+
+        return Htsmsg._decode(data, { }, data_position, data_end)
+    #
+
+    @staticmethod
+    def _decode_s64(data, data_position, data_end):
+        """
+Decodes a little-endian S64 HTSMSG field value with leading NULL bytes
+stripped.
+
+:param data: memoryview of the HTSMSG data
+:param data_position: Offset of the field value
+:param data_end: Offset after the field value
+
+:return: (int) Decoded value
+:since:  v0.2.00
+        """
+
+        value_struct = Htsmsg._S64_STRUCTS.get(data_end - data_position)
+
+        _return = (int.from_bytes(data[data_position:data_end], "little")
+                   if (value_struct is None) else
+                   value_struct.unpack_from(data, data_position)[0]
+                  )
+
+        if (_return == 0xffffffffffffffff): _return = -1
+        return _return
+    #
+
+    @staticmethod
+    def _decode_str(data, data_position, data_end):
+        """
+Decodes an UTF-8 encoded string HTSMSG field value.
+
+:param data: memoryview of the HTSMSG data
+:param data_position: Offset of the field value
+:param data_end: Offset after the field value
+
+:return: (str) Decoded string
+:since:  v0.2.00
+        """
+
+        return Binary.str(data[data_position:data_end].tobytes())
+    #
+
+    @staticmethod
+    def _encode(buffer, data, field_name = None):
+        """
+Encodes the given data as HTSMSG field and appends it to the buffer given.
+Sizes of maps and lists are written after all entries have been appended.
+
+:param buffer: bytearray to append the HTSMSG field data to
+:param data: Field content
+:param field_name: Field name
+
+:since: v0.1.00
+        """
+
+        field_encoder = Htsmsg._FIELD_ENCODERS.get(type(data))
+
+        if (field_encoder is None):
+            if (isinstance(data, dict)): field_encoder = Htsmsg._encode_map
+            elif (isinstance(data, Htsbin)): field_encoder = Htsmsg._encode_bin
+            elif (isinstance(data, list)): field_encoder = Htsmsg._encode_list
+            elif (isinstance(data, str)): field_encoder = Htsmsg._encode_str
             else: raise TypeException("Object type is not supported for HTSMSG")
         #
 
-        return _return
+        field_encoder(buffer, data, field_name)
     #
 
     @staticmethod
-    def _encode_field(_type, field_name, value):
+    def _encode_bin(buffer, data, field_name):
         """
-Encodes the HTSMSG field data given.
+Appends the given binary data as HTSMSG field to the buffer.
 
-:param data: HTSMSG field data
+:param buffer: bytearray to append the HTSMSG field data to
+:param data: Field content
+:param field_name: Field name
 
-:return: (mixed) Field content
-:since:  v0.1.00
+:since: v0.2.00
+        """
+
+        Htsmsg._encode_field(buffer, Htsmsg.TYPE_BIN, field_name, data)
+    #
+
+    @staticmethod
+    def _encode_field(buffer, _type, field_name, value = None):
         """
+Appends the HTSMSG field header, name and value given to the buffer.
 
+:param buffer: bytearray to append the HTSMSG field data to
+:param _type: HTSMSG field type
+:param field_name: Field name
+:param value: Encoded field value; None to write the size later
+
+:since: v0.1.00
+        """
+
+        field_name = (None if (field_name is None) else Binary.bytes(field_name))
         field_name_size = (0 if (field_name is None) else len(field_name))
-        _return = pack("!BBI", _type, field_name_size, len(value))
 
-        if (field_name is not None): _return += Binary.bytes(field_name)
-        _return += Binary.bytes(value)
+        buffer += Htsmsg._HEADER_STRUCT.pack(_type, field_name_size, (0 if (value is None) else len(value)))
 
-        return _return
+        if (field_name is not None): buffer += field_name
+        if (value is not None): buffer += value
+    #
+
+    @staticmethod
+    def _encode_field_size(buffer, header_position, size):
+        """
+Updates the field value size of the HTSMSG field header at the given
+position.
+
+:param buffer: bytearray containing the HTSMSG field data
+:param header_position: Position of the HTSMSG field header
+:param size: Field value size
+
+:since: v0.2.00
+        """
+
+        Htsmsg._SIZE_STRUCT.pack_into(buffer, header_position + Htsmsg.TYPE_ID_SIZE + Htsmsg.FIELD_NAME_LENGTH_SIZE, size)
+    #
+
+    @staticmethod
+    def _encode_list(buffer, data, field_name):
+        """
+Appends the given list as HTSMSG field to the buffer.
+
+:param buffer: bytearray to append the HTSMSG field data to
+:param data: Field content
+:param field_name: Field name
+
+:since: v0.2.00
+        """
+
+        header_position = len(buffer)
+        Htsmsg._encode_field(buffer, Htsmsg.TYPE_LIST, field_name)
+        field_value_position = len(buffer)
+
+        for entry in data: Htsmsg._encode(buffer, entry)
+
+        Htsmsg._encode_field_size(buffer, header_position, len(buffer) - field_value_position)
+    #
+
+    @staticmethod
+    def _encode_map(buffer, data, field_name):
+        """
+Appends the given dict as HTSMSG field to the buffer.
+
+:param buffer: bytearray to append the HTSMSG field data to
+:param data: Field content
+:param field_name: Field name
+
+:since: v0.2.00
+        """
+
+        header_position = len(buffer)
+        Htsmsg._encode_field(buffer, Htsmsg.TYPE_MAP, field_name)
+        field_value_position = len(buffer)
+
+        for data_key in data: Htsmsg._encode(buffer, data[data_key], data_key)
+
+        Htsmsg._encode_field_size(buffer, header_position, len(buffer) - field_value_position)
+    #
+
+    @staticmethod
+    def _encode_s64(buffer, data, field_name):
+        """
+Appends the given number as little-endian S64 HTSMSG field with leading
+NULL bytes stripped to the buffer.
+
+:param buffer: bytearray to append the HTSMSG field data to
+:param data: Field content
+:param field_name: Field name
+
+:since: v0.2.00
+        """
+
+        if (type(data) is float):
+            if (not data.is_integer()): raise ValueException("Numeric value is not supported by HTSMSG")
+            data = int(data)
+        #
+
+        if (data < -1 or data > 0xfffffffffffffffe): raise ValueException("Numeric value is not supported by HTSMSG")
+        if (data == -1): data = 0xffffffffffffffff
+
+        value = (Htsmsg.BINARY_NULL_BYTE
+                 if (data == 0) else
+                 data.to_bytes(((data.bit_length() + 7) >> 3), "little")
+                )
+
+        Htsmsg._encode_field(buffer, Htsmsg.TYPE_S64, field_name, value)
+    #
+
+    @staticmethod
+    def _encode_str(buffer, data, field_name):
+        """
+Appends the given string as UTF-8 encoded HTSMSG field to the buffer.
+
+:param buffer: bytearray to append the HTSMSG field data to
+:param data: Field content
+:param field_name: Field name
+
+:since: v0.2.00
+        """
+
+        Htsmsg._encode_field(buffer, Htsmsg.TYPE_STR, field_name, Binary.bytes(data))
     #
 
     @staticmethod
@@ -239,11 +454,28 @@ Imports a HTSMSG encoded message into this dict.
         if (type(message) is not Binary.BYTES_TYPE): raise TypeException("HTSMSG type given is invalid")
         if (message_size < Htsmsg.MESSAGE_LENGTH_SIZE): raise ValueException("HTSMSG is invalid")
 
-        size = unpack("!I", message[:Htsmsg.MESSAGE_LENGTH_SIZE])[0]
+        size = Htsmsg._SIZE_STRUCT.unpack_from(message)[0]
 
         if ((message_size - Htsmsg.MESSAGE_LENGTH_SIZE) != size): raise IOException("Malformed HTSMSG body")
 
-        return Htsmsg(Htsmsg._decode(message[Htsmsg.MESSAGE_LENGTH_SIZE:], { }))
+        return Htsmsg.import_message_body(memoryview(message), Htsmsg.MESSAGE_LENGTH_SIZE)
+    #
+
+    @staticmethod
+    def import_message_body(data, data_position = 0, data_end = None):
+        """
+Imports the HTSMSG encoded message body (without the length prefix) at the
+given position of the memoryview.
+
+:param data: memoryview of the HTSMSG data
+:param data_position: Offset of the message body
+:param data_end: Offset after the message body
+
+:return: (object) HTSMSG instance
+:since:  v0.2.00
+        """
+
+        return Htsmsg._decode(data, Htsmsg(), data_position, data_end)
     #
 
     @staticmethod
@@ -273,7 +505,7 @@ Imports a HTSMSG encoded message into this dict.
         #
 
         if (message is not None):
-            message_length = unpack("!I", message)[0]
+            message_length = Htsmsg._SIZE_STRUCT.unpack(message)[0]
             message += socket_reader.recv(message_length)
 
             if (len(message) != Htsmsg.MESSAGE_LENGTH_SIZE + message_length):
@@ -286,3 +518,19 @@ Imports a HTSMSG encoded message into this dict.
         return _return
     #
 #
+
+Htsmsg._FIELD_DECODERS = { Htsmsg.TYPE_BIN: Htsmsg._decode_bin,
+                           Htsmsg.TYPE_LIST: Htsmsg._decode_list,
+                           Htsmsg.TYPE_MAP: Htsmsg._decode_map,
+                           Htsmsg.TYPE_S64: Htsmsg._decode_s64,
+                           Htsmsg.TYPE_STR: Htsmsg._decode_str
+                         }
+
+Htsmsg._FIELD_ENCODERS = { dict: Htsmsg._encode_map,
+                           float: Htsmsg._encode_s64,
+                           Htsbin: Htsmsg._encode_bin,
+                           Htsmsg: Htsmsg._encode_map,
+                           int: Htsmsg._encode_s64,
+                           list: Htsmsg._encode_list,
+                           str: Htsmsg._encode_str
+                         }
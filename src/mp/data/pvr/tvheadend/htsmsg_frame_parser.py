@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+
+"""
+MediaProvider
+A device centric multimedia solution
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?mp;tvheadend
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+#echo(mpTvheadendVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from struct import Struct
+
+from dNG.runtime.io_exception import IOException
+from dNG.runtime.value_exception import ValueException
+
+from .htsmsg import Htsmsg
+from .lazy_htsmsg import LazyHtsmsg
+
+class HtsmsgFrameParser(object):
+    """
+Incremental parser for a stream of length prefixed HTSMSG frames. Received
+data is written into one reusable buffer and all complete messages are
+decoded from it in place.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    mp
+:subpackage: tvheadend
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;gpl
+             GNU General Public License 2
+    """
+
+    MAX_MESSAGE_SIZE = 268435456
+    """
+Largest HTSMSG frame accepted
+    """
+
+    _SIZE_STRUCT = Struct("!I")
+    """
+Precompiled message length codec
+    """
+
+    def __init__(self, buffer_size = 65536, lazy = False):
+        """
+Constructor __init__(HtsmsgFrameParser)
+
+:param buffer_size: Initial receive buffer size
+:param lazy: True to return LazyHtsmsg instances decoding fields on access
+
+:since: v0.2.00
+        """
+
+        if (buffer_size < Htsmsg.MESSAGE_LENGTH_SIZE): raise ValueException("Buffer size given is invalid")
+
+        self.buffer = bytearray(buffer_size)
+        """
+Reusable receive buffer
+        """
+        self.message_class = (LazyHtsmsg if (lazy) else Htsmsg)
+        """
+HTSMSG class used to import received messages
+        """
+        self.read_position = 0
+        """
+Position of the first byte not yet parsed
+        """
+        self.write_position = 0
+        """
+Position after the last byte received
+        """
+    #
+
+    def feed(self, data):
+        """
+Appends the given data to the receive buffer.
+
+:param data: Received data
+
+:since: v0.2.00
+        """
+
+        data_size = len(data)
+
+        self._ensure_free_size(data_size)
+        self.buffer[self.write_position:self.write_position + data_size] = data
+        self.write_position += data_size
+    #
+
+    def _ensure_free_size(self, size):
+        """
+Makes sure that at least the given number of bytes can be written to the
+receive buffer. Already parsed data is discarded first and the buffer is
+only grown if this is not sufficient.
+
+:param size: Number of bytes required
+
+:since: v0.2.00
+        """
+
+        if (len(self.buffer) - self.write_position < size):
+            pending_size = self.write_position - self.read_position
+
+            if (self.read_position > 0):
+                if (pending_size > 0): self.buffer[:pending_size] = self.buffer[self.read_position:self.write_position]
+
+                self.read_position = 0
+                self.write_position = pending_size
+            #
+
+            buffer_size = len(self.buffer)
+
+            if (buffer_size - self.write_position < size):
+                self.buffer.extend(bytearray(max(buffer_size, self.write_position + size - buffer_size)))
+            #
+        #
+    #
+
+    def get_messages(self):
+        """
+Returns all complete HTSMSG messages received.
+
+:return: (list) List of HTSMSG instances
+:since:  v0.2.00
+        """
+
+        _return = [ ]
+
+        data = memoryview(self.buffer)
+
+        try:
+            while (self.write_position - self.read_position >= Htsmsg.MESSAGE_LENGTH_SIZE):
+                body_position = self.read_position + Htsmsg.MESSAGE_LENGTH_SIZE
+                body_end = body_position + HtsmsgFrameParser._SIZE_STRUCT.unpack_from(data, self.read_position)[0]
+
+                if (body_end - body_position > HtsmsgFrameParser.MAX_MESSAGE_SIZE): raise IOException("HTSMSG frame size exceeds limit")
+                if (body_end > self.write_position): break
+
+                _return.append(self.message_class.import_message_body(data, body_position, body_end))
+                self.read_position = body_end
+            #
+        finally: data.release()
+
+        if (self.read_position == self.write_position):
+            self.read_position = 0
+            self.write_position = 0
+        #
+
+        return _return
+    #
+
+    def get_pending_size(self):
+        """
+Returns the number of bytes received but not yet parsed.
+
+:return: (int) Number of bytes
+:since:  v0.2.00
+        """
+
+        return self.write_position - self.read_position
+    #
+
+    def recv_into(self, _socket, size = None):
+        """
+Receives data from the given socket directly into the receive buffer.
+
+:param _socket: Socket to read from
+:param size: Maximum number of bytes to receive; None for all free space
+             available
+
+:return: (int) Number of bytes received; 0 if the socket has been closed
+:since:  v0.2.00
+        """
+
+        if (size is None):
+            required_size = Htsmsg.MESSAGE_LENGTH_SIZE
+
+            if (self.write_position - self.read_position >= Htsmsg.MESSAGE_LENGTH_SIZE):
+                required_size = (self.read_position
+                                 + Htsmsg.MESSAGE_LENGTH_SIZE
+                                 + HtsmsgFrameParser._SIZE_STRUCT.unpack_from(self.buffer, self.read_position)[0]
+                                 - self.write_position
+                                )
+
+                if (required_size > HtsmsgFrameParser.MAX_MESSAGE_SIZE): raise IOException("HTSMSG frame size exceeds limit")
+            #
+
+            self._ensure_free_size(max(required_size, Htsmsg.MESSAGE_LENGTH_SIZE))
+            size = len(self.buffer) - self.write_position
+        else: self._ensure_free_size(size)
+
+        data = memoryview(self.buffer)
+
+        try: _return = _socket.recv_into(data[self.write_position:self.write_position + size], size)
+        finally: data.release()
+
+        self.write_position += _return
+        return _return
+    #
+#
@@ -0,0 +1,467 @@
+# -*- coding: utf-8 -*-
+
+"""
+MediaProvider
+A device centric multimedia solution
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?mp;tvheadend
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+#echo(mpTvheadendVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from collections import OrderedDict
+
+from dNG.data.binary import Binary
+from dNG.runtime.io_exception import IOException
+from dNG.runtime.thread_lock import ThreadLock
+from dNG.runtime.type_exception import TypeException
+from dNG.runtime.value_exception import ValueException
+
+from .htsmsg import Htsmsg
+
+class LazyHtsmsg(Htsmsg):
+    """
+HTSMSG message indexing its top-level fields once and decoding values on
+first access only. It behaves like a "dict" for existing callers; methods
+iterating over all fields decode the remaining ones first. Fields may be
+decoded concurrently by several threads.
+
+Note: Encoders bypassing the "dict" methods overridden (e.g. the C encoder
+of "json.dumps()") only see fields already decoded. Use "copy()" first.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    mp
+:subpackage: tvheadend
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;gpl
+             GNU General Public License 2
+    """
+
+    _decoding_lock = ThreadLock()
+    """
+Thread safety lock shared by all instances for decoding fields
+    """
+
+    def __init__(self, data = None, data_position = 0, data_end = None):
+        """
+Constructor __init__(LazyHtsmsg)
+
+:param data: memoryview of the HTSMSG message body
+:param data_position: Offset of the message body
+:param data_end: Offset after the message body
+
+:since: v0.2.00
+        """
+
+        Htsmsg.__init__(self)
+
+        self._data = data
+        """
+memoryview of the HTSMSG data
+        """
+        self._fields = OrderedDict()
+        """
+Field name to ( type, value offset, value end ) of fields not yet decoded
+        """
+
+        if (data is not None): self._index_fields(data_position, data_end)
+    #
+
+    def __contains__(self, key):
+        """
+python.org: Called to implement membership test operators.
+
+:param key: Field name
+
+:return: (bool) True if the field exists
+:since:  v0.2.00
+        """
+
+        return (key in self._fields or Htsmsg.__contains__(self, key))
+    #
+
+    def __delitem__(self, key):
+        """
+python.org: Called to implement deletion of self[key].
+
+:param key: Field name
+
+:since: v0.2.00
+        """
+
+        if (self._fields.pop(key, None) is None): Htsmsg.__delitem__(self, key)
+    #
+
+    def __eq__(self, other):
+        """
+python.org: Rich comparison "x == y".
+
+:param other: Object to compare with
+
+:return: (bool) True if equal
+:since:  v0.2.00
+        """
+
+        self._decode_fields()
+        if (isinstance(other, LazyHtsmsg)): other._decode_fields()
+
+        return Htsmsg.__eq__(self, other)
+    #
+
+    def __iter__(self):
+        """
+python.org: Return an iterator object.
+
+:return: (object) Iterator object
+:since:  v0.2.00
+        """
+
+        self._decode_fields()
+        return Htsmsg.__iter__(self)
+    #
+
+    def __len__(self):
+        """
+python.org: Called to implement the built-in function len().
+
+:return: (int) Number of fields
+:since:  v0.2.00
+        """
+
+        with LazyHtsmsg._decoding_lock: return Htsmsg.__len__(self) + len(self._fields)
+    #
+
+    def __missing__(self, key):
+        """
+python.org: Called by dict.__getitem__() to implement self[key] for dict
+subclasses when key is not in the dictionary.
+
+:param key: Field name
+
+:return: (mixed) Decoded field value
+:since:  v0.2.00
+        """
+
+        return self._decode_field(key)
+    #
+
+    def __ne__(self, other):
+        """
+python.org: Rich comparison "x != y".
+
+:param other: Object to compare with
+
+:return: (bool) True if not equal
+:since:  v0.2.00
+        """
+
+        return (not self.__eq__(other))
+    #
+
+    def __reduce__(self):
+        """
+python.org: Return either a string or a tuple describing how to pickle or
+copy this object.
+
+:return: (tuple) Decoded Htsmsg reconstruction data
+:since:  v0.2.00
+        """
+
+        return ( Htsmsg, ( self.copy(), ) )
+    #
+
+    def __repr__(self):
+        """
+python.org: Called by the repr() built-in function to compute the "official"
+string representation of an object.
+
+:return: (str) String representation
+:since:  v0.2.00
+        """
+
+        self._decode_fields()
+        return Htsmsg.__repr__(self)
+    #
+
+    def __setitem__(self, key, value):
+        """
+python.org: Called to implement assignment to self[key].
+
+:param key: Field name
+:param value: Field value
+
+:since: v0.2.00
+        """
+
+        self._fields.pop(key, None)
+        Htsmsg.__setitem__(self, key, value)
+    #
+
+    def clear(self):
+        """
+python.org: Remove all items from the dictionary.
+
+:since: v0.2.00
+        """
+
+        self._fields.clear()
+        Htsmsg.clear(self)
+    #
+
+    def copy(self):
+        """
+python.org: Return a shallow copy of the dictionary.
+
+:return: (object) Decoded Htsmsg instance
+:since:  v0.2.00
+        """
+
+        self._decode_fields()
+        return Htsmsg(self)
+    #
+
+    def _decode_field(self, key):
+        """
+Decodes, caches and returns the value of the field given.
+
+:param key: Field name
+
+:return: (mixed) Decoded field value
+:since:  v0.2.00
+        """
+
+        with LazyHtsmsg._decoding_lock:
+            # Thread safety
+            if (Htsmsg.__contains__(self, key)): return Htsmsg.__getitem__(self, key)
+
+            field = self._fields.get(key)
+            if (field is None): raise KeyError(key)
+
+            field_type, field_value_position, field_value_end = field
+            _return = Htsmsg._FIELD_DECODERS[field_type](self._data, field_value_position, field_value_end)
+
+            Htsmsg.__setitem__(self, key, _return)
+            self._fields.pop(key, None)
+        #
+
+        return _return
+    #
+
+    def _decode_fields(self):
+        """
+Decodes all fields not yet decoded.
+
+:since: v0.2.00
+        """
+
+        with LazyHtsmsg._decoding_lock:
+            for key in list(self._fields.keys()): self._decode_field(key)
+        #
+    #
+
+    def get(self, key, default = None):
+        """
+python.org: Return the value for key if key is in the dictionary, else
+default.
+
+:param key: Field name
+:param default: Default value
+
+:return: (mixed) Field value
+:since:  v0.2.00
+        """
+
+        return (self[key] if (key in self) else default)
+    #
+
+    def _index_fields(self, data_position, data_end):
+        """
+Indexes the top-level fields of the HTSMSG message body without decoding
+their values.
+
+:param data_position: Offset of the message body
+:param data_end: Offset after the message body
+
+:since: v0.2.00
+        """
+
+        data = self._data
+
+        if (data_end is None): data_end = len(data)
+
+        field_decoders = Htsmsg._FIELD_DECODERS
+        header_size = Htsmsg._HEADER_STRUCT.size
+        header_unpack_from = Htsmsg._HEADER_STRUCT.unpack_from
+
+        if (data_end > data_position and (data_end - data_position) < header_size): raise ValueException("HTSMSG is invalid")
+
+        while ((data_end - data_position) >= header_size):
+            field_type, field_name_size, field_value_size = header_unpack_from(data, data_position)
+
+            field_name_position = data_position + header_size
+            field_value_position = field_name_position + field_name_size
+            data_position = field_value_position + field_value_size
+
+            if (data_position > data_end): raise IOException("Malformed HTSMSG field")
+            if (field_type not in field_decoders): continue
+            if (field_name_size < 1): raise IOException("Malformed HTSMSG field name")
+
+            field_name = Binary.str(data[field_name_position:field_value_position].tobytes())
+            self._fields[field_name] = ( field_type, field_value_position, data_position )
+        #
+    #
+
+    def items(self):
+        """
+python.org: Return a new view of the dictionary's items.
+
+:return: (object) Items view
+:since:  v0.2.00
+        """
+
+        self._decode_fields()
+        return Htsmsg.items(self)
+    #
+
+    def keys(self):
+        """
+python.org: Return a new view of the dictionary's keys.
+
+:return: (object) Keys view
+:since:  v0.2.00
+        """
+
+        self._decode_fields()
+        return Htsmsg.keys(self)
+    #
+
+    def pop(self, key, *args):
+        """
+python.org: If key is in the dictionary, remove it and return its value,
+else return default.
+
+:param key: Field name
+
+:return: (mixed) Field value
+:since:  v0.2.00
+        """
+
+        if (key in self._fields): self._decode_field(key)
+        return Htsmsg.pop(self, key, *args)
+    #
+
+    def popitem(self):
+        """
+python.org: Remove and return a (key, value) pair from the dictionary.
+
+:return: (tuple) Key and value
+:since:  v0.2.00
+        """
+
+        self._decode_fields()
+        return Htsmsg.popitem(self)
+    #
+
+    def setdefault(self, key, default = None):
+        """
+python.org: If key is in the dictionary, return its value. If not, insert
+key with a value of default and return default.
+
+:param key: Field name
+:param default: Default value
+
+:return: (mixed) Field value
+:since:  v0.2.00
+        """
+
+        if (key in self._fields): self._decode_field(key)
+        return Htsmsg.setdefault(self, key, default)
+    #
+
+    def update(self, *args, **kwargs):
+        """
+python.org: Update the dictionary with the key/value pairs from other,
+overwriting existing keys.
+
+:since: v0.2.00
+        """
+
+        for key, value in dict(*args, **kwargs).items(): self[key] = value
+    #
+
+    def values(self):
+        """
+python.org: Return a new view of the dictionary's values.
+
+:return: (object) Values view
+:since:  v0.2.00
+        """
+
+        self._decode_fields()
+        return Htsmsg.values(self)
+    #
+
+    @staticmethod
+    def import_message(message):
+        """
+Imports a HTSMSG encoded message lazily.
+
+:param message: HTSMSG encoded message
+
+:return: (object) LazyHtsmsg instance
+:since:  v0.2.00
+        """
+
+        message = Binary.bytes(message)
+
+        if (type(message) is not Binary.BYTES_TYPE): raise TypeException("HTSMSG type given is invalid")
+        if (len(message) < Htsmsg.MESSAGE_LENGTH_SIZE): raise ValueException("HTSMSG is invalid")
+
+        if ((len(message) - Htsmsg.MESSAGE_LENGTH_SIZE) != Htsmsg._SIZE_STRUCT.unpack_from(message)[0]):
+            raise IOException("Malformed HTSMSG body")
+        #
+
+        return LazyHtsmsg(memoryview(message), Htsmsg.MESSAGE_LENGTH_SIZE)
+    #
+
+    @staticmethod
+    def import_message_body(data, data_position = 0, data_end = None):
+        """
+Imports the HTSMSG encoded message body (without the length prefix) at the
+given position lazily. The body is copied as the given memoryview may be
+reused by the caller.
+
+:param data: memoryview of the HTSMSG data
+:param data_position: Offset of the message body
+:param data_end: Offset after the message body
+
+:return: (object) LazyHtsmsg instance
+:since:  v0.2.00
+        """
+
+        if (data_end is None): data_end = len(data)
+        return LazyHtsmsg(memoryview(data[data_position:data_end].tobytes()))
+    #
+#
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+
+"""
+MediaProvider
+A device centric multimedia solution
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?mp;tvheadend
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+#echo(mpTvheadendVersion)#
+#echo(__FILEPATH__)#
+"""
+
+# pylint: disable=import-error,no-name-in-module
+
+from threading import Condition
+from weakref import ref
+
+from dNG.runtime.instance_lock import InstanceLock
+from dNG.runtime.thread_lock import ThreadLock
+
+class RecordingStatusIndex(object):
+    """
+In-memory index of the recording status of Tvheadend DVR entries. It is
+kept current with the "dvrEntry*" events received and answers capability
+checks without a database round-trip. Readers may wait for the next event
+of a DVR entry.
+
+:author:     direct Netware Group et al.
+:copyright:  (C) direct Netware Group - All rights reserved
+:package:    mp
+:subpackage: tvheadend
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;gpl
+             GNU General Public License 2
+    """
+
+    _instance_lock = InstanceLock()
+    """
+Thread safety lock
+    """
+    _weakref_instance = None
+    """
+RecordingStatusIndex weakref instance
+    """
+
+    def __init__(self):
+        """
+Constructor __init__(RecordingStatusIndex)
+
+:since: v0.2.00
+        """
+
+        self._lock = ThreadLock()
+        """
+Thread safety lock
+        """
+        self.synchronized = False
+        """
+True if the initial synchronization has been completed
+        """
+        self.statuses = { }
+        """
+Recording status by DVR entry ID
+        """
+        self._update_condition = Condition()
+        """
+Condition notified for each event received
+        """
+        self.versions = { }
+        """
+Number of events received by DVR entry ID
+        """
+    #
+
+    def clear(self):
+        """
+Removes all entries and versions and resets the synchronization state.
+
+:since: v0.2.00
+        """
+
+        with self._lock:
+            self.statuses.clear()
+            self.synchronized = False
+        #
+
+        with self._update_condition:
+            self.versions.clear()
+            self._update_condition.notify_all()
+        #
+    #
+
+    def __contains__(self, dvr_id):
+        """
+python.org: Called to implement membership test operators.
+
+:param dvr_id: Tvheadend DVR entry ID
+
+:return: (bool) True if the DVR entry ID is known
+:since:  v0.2.00
+        """
+
+        return (str(dvr_id) in self.statuses)
+    #
+
+    def get(self, dvr_id, default = None):
+        """
+Returns the recording status of the given DVR entry ID.
+
+:param dvr_id: Tvheadend DVR entry ID
+:param default: Value returned if the DVR entry ID is unknown
+
+:return: (int) Recording status
+:since:  v0.2.00
+        """
+
+        return self.statuses.get(str(dvr_id), default)
+    #
+
+    def get_version(self, dvr_id):
+        """
+Returns the number of events received for the given DVR entry ID.
+
+:param dvr_id: Tvheadend DVR entry ID
+
+:return: (int) Version
+:since:  v0.2.00
+        """
+
+        return self.versions.get(str(dvr_id), 0)
+    #
+
+    def is_synchronized(self):
+        """
+Returns true if the initial synchronization has been completed. Unknown
+DVR entry IDs are not available on the Tvheadend server afterwards.
+
+:return: (bool) True if synchronized
+:since:  v0.2.00
+        """
+
+        return self.synchronized
+    #
+
+    def notify(self, dvr_id):
+        """
+Notifies readers waiting for an event of the given DVR entry ID.
+
+:param dvr_id: Tvheadend DVR entry ID
+
+:since: v0.2.00
+        """
+
+        dvr_id = str(dvr_id)
+
+        with self._update_condition:
+            self.versions[dvr_id] = 1 + self.versions.get(dvr_id, 0)
+            self._update_condition.notify_all()
+        #
+    #
+
+    def remove(self, dvr_id):
+        """
+Removes the given DVR entry ID and its version. Readers waiting for an
+event of it are notified.
+
+:param dvr_id: Tvheadend DVR entry ID
+
+:since: v0.2.00
+        """
+
+        dvr_id = str(dvr_id)
+
+        with self._lock: self.statuses.pop(dvr_id, None)
+
+        with self._update_condition:
+            # Waiting readers see a changed version as it is reset to 0.
+            self.versions.pop(dvr_id, None)
+            self._update_condition.notify_all()
+        #
+    #
+
+    def set(self, dvr_id, recording_status):
+        """
+Sets the recording status of the given DVR entry ID.
+
+:param dvr_id: Tvheadend DVR entry ID
+:param recording_status: Recording status
+
+:since: v0.2.00
+        """
+
+        with self._lock: self.statuses[str(dvr_id)] = recording_status
+        self.notify(dvr_id)
+    #
+
+    def set_synchronized(self, synchronized = True):
+        """
+Sets the initial synchronization state.
+
+:param synchronized: True if the initial synchronization has been completed
+
+:since: v0.2.00
+        """
+
+        self.synchronized = synchronized
+    #
+
+    def wait(self, dvr_id, version, timeout = None):
+        """
+Waits for an event of the given DVR entry ID received after the given
+version.
+
+:param dvr_id: Tvheadend DVR entry ID
+:param version: Version returned by "get_version()" before
+:param timeout: Maximum number of seconds to wait
+
+:return: (bool) True if an event has been received
+:since:  v0.2.00
+        """
+
+        dvr_id = str(dvr_id)
+
+        with self._update_condition:
+            return self._update_condition.wait_for(lambda: self.versions.get(dvr_id, 0) != version, timeout)
+        #
+    #
+
+    @staticmethod
+    def get_instance():
+        """
+Get the RecordingStatusIndex singleton.
+
+:return: (RecordingStatusIndex) Object on success
+:since:  v0.2.00
+        """
+
+        _return = None
+
+        with RecordingStatusIndex._instance_lock:
+            if (RecordingStatusIndex._weakref_instance is not None): _return = RecordingStatusIndex._weakref_instance()
+
+            if (_return is None):
+                _return = RecordingStatusIndex()
+                RecordingStatusIndex._weakref_instance = ref(_return)
+            #
+        #
+
+        return _return
+    #
+#
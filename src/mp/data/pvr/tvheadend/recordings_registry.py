@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+"""
+MediaProvider
+A device centric multimedia solution
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?mp;tvheadend
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+#echo(mpTvheadendVersion)#
+#echo(__FILEPATH__)#
+"""
+
+# pylint: disable=import-error,no-name-in-module
+
+from dNG.runtime.thread_lock import ThreadLock
+
+class RecordingsRegistry(object):
+    """
+Registry of the recordings announced by the Tvheadend server. Entries are
+keyed by DVR entry ID and indexed by VFS URL to reconcile the UPnP
+container in linear time.
+
+:author:     direct Netware Group et al.
+:copyright:  (C) direct Netware Group - All rights reserved
+:package:    mp
+:subpackage: tvheadend
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;gpl
+             GNU General Public License 2
+    """
+
+    def __init__(self):
+        """
+Constructor __init__(RecordingsRegistry)
+
+:since: v0.2.00
+        """
+
+        self.dvr_ids = { }
+        """
+DVR entry IDs by VFS URL
+        """
+        self._lock = ThreadLock()
+        """
+Thread safety lock
+        """
+        self.vfs_urls = { }
+        """
+VFS URLs by DVR entry ID
+        """
+    #
+
+    def add(self, dvr_id, vfs_url):
+        """
+Adds or updates the given DVR entry ID.
+
+:param dvr_id: Tvheadend DVR entry ID
+:param vfs_url: VFS URL of the recording
+
+:since: v0.2.00
+        """
+
+        dvr_id = str(dvr_id)
+
+        with self._lock:
+            vfs_url_old = self.vfs_urls.get(dvr_id)
+            if (vfs_url_old is not None): self.dvr_ids.pop(vfs_url_old, None)
+
+            self.dvr_ids[vfs_url] = dvr_id
+            self.vfs_urls[dvr_id] = vfs_url
+        #
+    #
+
+    def clear(self):
+        """
+Removes all entries.
+
+:since: v0.2.00
+        """
+
+        with self._lock:
+            self.dvr_ids.clear()
+            self.vfs_urls.clear()
+        #
+    #
+
+    def __contains__(self, dvr_id):
+        """
+python.org: Called to implement membership test operators.
+
+:param dvr_id: Tvheadend DVR entry ID
+
+:return: (bool) True if the DVR entry ID is registered
+:since:  v0.2.00
+        """
+
+        return (str(dvr_id) in self.vfs_urls)
+    #
+
+    def get_unregistered_vfs_urls(self, vfs_urls):
+        """
+Returns the given VFS URLs not registered.
+
+:param vfs_urls: Iterable of VFS URLs
+
+:return: (list) VFS URLs not registered
+:since:  v0.2.00
+        """
+
+        with self._lock: return [ vfs_url for vfs_url in vfs_urls if vfs_url not in self.dvr_ids ]
+    #
+
+    def __len__(self):
+        """
+python.org: Called to implement the built-in function len().
+
+:return: (int) Number of DVR entry IDs registered
+:since:  v0.2.00
+        """
+
+        return len(self.vfs_urls)
+    #
+
+    def remove(self, dvr_id):
+        """
+Removes the given DVR entry ID.
+
+:param dvr_id: Tvheadend DVR entry ID
+
+:since: v0.2.00
+        """
+
+        dvr_id = str(dvr_id)
+
+        with self._lock:
+            vfs_url = self.vfs_urls.pop(dvr_id, None)
+            if (vfs_url is not None): self.dvr_ids.pop(vfs_url, None)
+        #
+    #
+#
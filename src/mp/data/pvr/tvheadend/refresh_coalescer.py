@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+"""
+MediaProvider
+A device centric multimedia solution
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?mp;tvheadend
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+#echo(mpTvheadendVersion)#
+#echo(__FILEPATH__)#
+"""
+
+# pylint: disable=import-error,no-name-in-module
+
+from dNG.data.settings import Settings
+from dNG.runtime.thread_lock import ThreadLock
+
+class RefreshCoalescer(object):
+    """
+Merges the fields of "dvrEntryAdd" and "dvrEntryUpdate" messages received
+for a DVR entry within the debounce time. Only the merged states are
+written to the database by the batch refresh task scheduled for the first
+message pending. The debounce time starts with this first message and is
+not extended by messages received afterwards.
+
+Messages are kept as received and merged if the batch refresh task runs.
+Fields of lazily decoded messages are therefore only decoded if the task
+runs.
+
+:author:     direct Netware Group et al.
+:copyright:  (C) direct Netware Group - All rights reserved
+:package:    mp
+:subpackage: tvheadend
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;gpl
+             GNU General Public License 2
+    """
+
+    def __init__(self, debounce_time = None):
+        """
+Constructor __init__(RefreshCoalescer)
+
+:param debounce_time: Seconds to wait for further messages
+
+:since: v0.2.00
+        """
+
+        if (debounce_time is None): debounce_time = int(Settings.get("mp_tvheadend_refresh_debounce_time", 2))
+
+        self.debounce_time = debounce_time
+        """
+Seconds to wait for further messages
+        """
+        self._lock = ThreadLock()
+        """
+Thread safety lock
+        """
+        self.messages = { }
+        """
+List of messages pending by DVR entry ID
+        """
+    #
+
+    def discard(self, dvr_id):
+        """
+Discards the messages pending for the given DVR entry ID.
+
+:param dvr_id: Tvheadend DVR entry ID
+
+:since: v0.2.00
+        """
+
+        with self._lock: self.messages.pop(str(dvr_id), None)
+    #
+
+    def get_debounce_time(self):
+        """
+Returns the seconds to wait for further messages after the first one
+pending.
+
+:return: (int) Debounce time
+:since:  v0.2.00
+        """
+
+        return self.debounce_time
+    #
+
+    def merge(self, dvr_id, message):
+        """
+Adds the given message to the ones pending for the DVR entry ID. Later
+fields override earlier ones if merged.
+
+:param dvr_id: Tvheadend DVR entry ID
+:param message: HTSP message received
+
+:return: (bool) True if no message has been pending at all and a batch
+         refresh task should be scheduled
+:since:  v0.2.00
+        """
+
+        dvr_id = str(dvr_id)
+
+        with self._lock:
+            _return = (len(self.messages) < 1)
+            self.messages.setdefault(dvr_id, [ ]).append(message)
+        #
+
+        return _return
+    #
+
+    def pop_all(self):
+        """
+Returns and removes all merged messages pending. Messages received
+afterwards require a new batch refresh task.
+
+:return: (list) Merged messages
+:since:  v0.2.00
+        """
+
+        with self._lock:
+            messages = self.messages
+            self.messages = { }
+        #
+
+        _return = [ ]
+
+        for dvr_messages in messages.values():
+            merged_message = { }
+            for message in dvr_messages: merged_message.update(message)
+
+            _return.append(merged_message)
+        #
+
+        return _return
+    #
+#
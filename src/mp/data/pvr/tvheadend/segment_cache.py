@@ -0,0 +1,373 @@
+# -*- coding: utf-8 -*-
+
+"""
+MediaProvider
+A device centric multimedia solution
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?mp;tvheadend
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+#echo(mpTvheadendVersion)#
+#echo(__FILEPATH__)#
+"""
+
+# pylint: disable=import-error,no-name-in-module
+
+from collections import OrderedDict
+from weakref import ref
+import mmap
+import os
+import re
+
+from dNG.data.settings import Settings
+from dNG.runtime.instance_lock import InstanceLock
+from dNG.runtime.thread_lock import ThreadLock
+from dNG.runtime.value_exception import ValueException
+
+class SegmentCache(object):
+    """
+Local on-disk cache of finished Tvheadend recordings. Files are split into
+segments of a fixed size stored below "mp_tvheadend_vfs_segment_cache_path"
+and served from memory maps. The least recently used segments are evicted
+if the total size exceeds "mp_tvheadend_vfs_segment_cache_size".
+
+:author:     direct Netware Group et al.
+:copyright:  (C) direct Netware Group - All rights reserved
+:package:    mp
+:subpackage: tvheadend
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;gpl
+             GNU General Public License 2
+    """
+
+    RE_SEGMENT_FILE_NAME = re.compile("^(\\w+)\\.(\\d+)\\.segment$")
+    """
+RegExp to parse segment file names
+    """
+
+    _instance_lock = InstanceLock()
+    """
+Thread safety lock
+    """
+    _weakref_instance = None
+    """
+SegmentCache weakref instance
+    """
+
+    def __init__(self):
+        """
+Constructor __init__(SegmentCache)
+
+:since: v0.2.00
+        """
+
+        self._lock = ThreadLock()
+        """
+Thread safety lock
+        """
+        self.max_size = int(Settings.get("mp_tvheadend_vfs_segment_cache_size", 1073741824))
+        """
+Maximum total size of all cached segments in bytes
+        """
+        self.path = Settings.get("mp_tvheadend_vfs_segment_cache_path")
+        """
+Directory containing the cached segments
+        """
+        self.segment_size = int(Settings.get("mp_tvheadend_vfs_segment_cache_segment_size", 4194304))
+        """
+Size of a segment in bytes
+        """
+        self.segments = OrderedDict()
+        """
+Memory maps of cached segments ordered by last use
+        """
+        self.size = 0
+        """
+Total size of all cached segments in bytes
+        """
+
+        if (self.path is not None): self._load_segments()
+    #
+
+    def _close_segment(self, key):
+        """
+Removes the given segment from the cache and deletes its file.
+
+:param key: Segment key ( DVR entry ID, segment index )
+
+:since: v0.2.00
+        """
+
+        segment = self.segments.pop(key)
+
+        self.size -= len(segment)
+        segment.close()
+
+        try: os.unlink(self._get_segment_file_path(*key))
+        except OSError: pass
+    #
+
+    def _evict(self, size):
+        """
+Evicts the least recently used segments until the given number of bytes
+fits into the cache.
+
+:param size: Bytes to be added
+
+:since: v0.2.00
+        """
+
+        while (len(self.segments) > 0 and self.size + size > self.max_size):
+            self._close_segment(next(iter(self.segments)))
+        #
+    #
+
+    def get(self, dvr_id, offset, size, file_size):
+        """
+Returns cached data of the segment containing the given offset. A segment
+shorter than expected for the file size given is removed and handled as
+not cached.
+
+:param dvr_id: Tvheadend DVR entry ID
+:param offset: Offset of the data requested
+:param size: Maximum number of bytes to return; data is not read beyond
+             the end of the segment
+:param file_size: Size of the file in bytes
+
+:return: (bytes) Data; None if the segment is not cached
+:since:  v0.2.00
+        """
+
+        _return = None
+
+        key = ( str(dvr_id), offset // self.segment_size )
+
+        with self._lock:
+            segment = self.segments.get(key)
+
+            if (segment is not None and len(segment) != self._get_expected_segment_size(key[1], file_size)):
+                self._close_segment(key)
+                segment = None
+            #
+
+            if (segment is not None):
+                self.segments.move_to_end(key)
+
+                segment_offset = offset - (key[1] * self.segment_size)
+                _return = segment[segment_offset:segment_offset + size]
+            #
+        #
+
+        return _return
+    #
+
+    def _get_expected_segment_size(self, index, file_size):
+        """
+Returns the expected size of the given segment. Only the last segment of a
+file is smaller than the segment size.
+
+:param index: Segment index
+:param file_size: Size of the file in bytes
+
+:return: (int) Segment size in bytes
+:since:  v0.2.00
+        """
+
+        return max(0, min(self.segment_size, file_size - (index * self.segment_size)))
+    #
+
+    def get_segment_range(self, offset):
+        """
+Returns the byte range of the segment containing the given offset.
+
+:param offset: File offset
+
+:return: (tuple) Segment offset and size
+:since:  v0.2.00
+        """
+
+        return ( offset - (offset % self.segment_size), self.segment_size )
+    #
+
+    def _get_segment_file_path(self, dvr_id, index):
+        """
+Returns the file path of the given segment.
+
+:param dvr_id: Tvheadend DVR entry ID
+:param index: Segment index
+
+:return: (str) File path
+:since:  v0.2.00
+        """
+
+        return os.path.join(self.path, "{0}.{1:d}.segment".format(dvr_id, index))
+    #
+
+    def _load_segments(self):
+        """
+Loads the segments cached by previous runs ordered by their modification
+time.
+
+:since: v0.2.00
+        """
+
+        if (not os.path.isdir(self.path)): os.makedirs(self.path)
+
+        segment_files = [ ]
+
+        for file_name in os.listdir(self.path):
+            re_result = SegmentCache.RE_SEGMENT_FILE_NAME.match(file_name)
+            file_path = os.path.join(self.path, file_name)
+
+            if (re_result is not None):
+                segment_files.append(( os.stat(file_path).st_mtime, re_result.group(1), int(re_result.group(2)) ))
+            elif (file_name.endswith(".tmp")): os.unlink(file_path)
+        #
+
+        segment_files.sort()
+
+        for _, dvr_id, index in segment_files:
+            key = ( dvr_id, index )
+            segment = self._open_segment(*key)
+
+            if (segment is None): continue
+
+            self.segments[key] = segment
+            self.size += len(segment)
+        #
+
+        with self._lock: self._evict(0)
+    #
+
+    def _open_segment(self, dvr_id, index):
+        """
+Returns a read-only memory map of the given segment file.
+
+:param dvr_id: Tvheadend DVR entry ID
+:param index: Segment index
+
+:return: (object) Memory map; None if the file is empty
+:since:  v0.2.00
+        """
+
+        _return = None
+
+        with open(self._get_segment_file_path(dvr_id, index), "rb") as file_object:
+            if (os.fstat(file_object.fileno()).st_size > 0):
+                _return = mmap.mmap(file_object.fileno(), 0, access = mmap.ACCESS_READ)
+            #
+        #
+
+        return _return
+    #
+
+    def put(self, dvr_id, offset, data, file_size):
+        """
+Caches the data of the segment starting at the given offset. Data shorter
+than expected for the file size given (e.g. of a short read) is not cached.
+
+:param dvr_id: Tvheadend DVR entry ID
+:param offset: Segment offset
+:param data: Segment data; only the last segment of a file may be smaller
+             than the segment size
+:param file_size: Size of the file in bytes
+
+:since: v0.2.00
+        """
+
+        if (offset % self.segment_size != 0): raise ValueException("Offset given is not aligned to the segment size")
+
+        key = ( str(dvr_id), offset // self.segment_size )
+        size = len(data)
+
+        if (0 < size <= self.max_size and size == self._get_expected_segment_size(key[1], file_size)):
+
+            file_path = self._get_segment_file_path(*key)
+            file_path_tmp = "{0}.{1:d}.tmp".format(file_path, id(data))
+
+            with open(file_path_tmp, "wb") as file_object: file_object.write(data)
+
+            with self._lock:
+                if (key in self.segments): os.unlink(file_path_tmp)
+                else:
+                    self._evict(size)
+
+                    os.rename(file_path_tmp, file_path)
+
+                    self.segments[key] = self._open_segment(*key)
+                    self.size += size
+                #
+            #
+        #
+    #
+
+    def remove(self, dvr_id):
+        """
+Removes all cached segments of the given DVR entry ID.
+
+:param dvr_id: Tvheadend DVR entry ID
+
+:since: v0.2.00
+        """
+
+        dvr_id = str(dvr_id)
+
+        with self._lock:
+            for key in [ key for key in self.segments if key[0] == dvr_id ]: self._close_segment(key)
+        #
+    #
+
+    @staticmethod
+    def get_instance():
+        """
+Get the SegmentCache singleton.
+
+:return: (SegmentCache) Object on success
+:since:  v0.2.00
+        """
+
+        _return = None
+
+        with SegmentCache._instance_lock:
+            if (SegmentCache._weakref_instance is not None): _return = SegmentCache._weakref_instance()
+
+            if (_return is None):
+                _return = SegmentCache()
+                SegmentCache._weakref_instance = ref(_return)
+            #
+        #
+
+        return _return
+    #
+
+    @staticmethod
+    def is_enabled():
+        """
+Returns true if a segment cache directory has been configured.
+
+:return: (bool) True if enabled
+:since:  v0.2.00
+        """
+
+        return (Settings.get("mp_tvheadend_vfs_segment_cache_path") is not None)
+    #
+#
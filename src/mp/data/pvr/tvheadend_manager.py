@@ -33,13 +33,18 @@ https://www.direct-netware.de/redirect?licenses;gpl
 from weakref import ref
 
 from dNG.data.tasks.memory import Memory as MemoryTasks
-from dNG.data.upnp.resources.mp_entry_pvr_recording import MpEntryPvrRecording
-from dNG.database.connection import Connection
 from dNG.plugins.hook import Hook
 from dNG.runtime.thread_lock import ThreadLock
 
-from mp.net.tvheadend.client import Client
+from mp.data.pvr.tvheadend.recording_status_index import RecordingStatusIndex
+from mp.data.pvr.tvheadend.recordings_registry import RecordingsRegistry
+from mp.data.pvr.tvheadend.refresh_coalescer import RefreshCoalescer
+from mp.data.pvr.tvheadend.segment_cache import SegmentCache
+from mp.net.tvheadend.client_pool import ClientPool
+from mp.net.tvheadend.file_handle_pool import FileHandlePool
 from mp.tasks.resource_deleter import ResourceDeleter
+from mp.tasks.resource_pvr_recording_tvheadend_batch_refresh import ResourcePvrRecordingTvheadendBatchRefresh
+from mp.tasks.resource_pvr_recording_tvheadend_reconciliation import ResourcePvrRecordingTvheadendReconciliation
 from mp.tasks.resource_pvr_recording_tvheadend_refresh import ResourcePvrRecordingTvheadendRefresh
 
 from .abstract_manager import AbstractManager
@@ -73,15 +78,35 @@ Constructor __init__(TvheadendManager)
 
         self.client = None
         """
-Tvheadend client instance
+Tvheadend client instance subscribed to async metadata
+        """
+        self.client_pool = None
+        """
+Tvheadend client pool instance
+        """
+        self.file_handle_pool = None
+        """
+Tvheadend file handle pool instance
         """
         self._lock = ThreadLock()
         """
 Thread safety lock
         """
-        self.recordings_cache = [ ]
+        self.recording_status_index = None
+        """
+Recording status index kept current with the events received
+        """
+        self.recordings_registry = RecordingsRegistry()
+        """
+Registry of the recordings announced by the Tvheadend server
+        """
+        self.refresh_coalescer = None
         """
-Cached list of synchronized recordings
+Coalescer merging DVR entry messages received within the debounce time
+        """
+        self.segment_cache = None
+        """
+Local segment cache of finished recordings
         """
     #
 
@@ -103,56 +128,49 @@ Called for "mp.pvr.tvheadend.Client.onEvent"
             if (method in ( "dvrEntryAdd", "dvrEntryUpdate" )):
                 _id = message['id']
 
-                MemoryTasks.get_instance().add("mp.tasks.ResourcePvrRecordingTvheadendRefresh.{0}".format(_id),
-                                               ResourcePvrRecordingTvheadendRefresh(self.get_container(), message, self.get_name()),
-                                               0
-                                              )
+                if (self.recording_status_index is not None):
+                    if (method == "dvrEntryAdd" or "state" in message):
+                        self.recording_status_index.set(_id, ResourcePvrRecordingTvheadendRefresh.get_recording_status(message))
+                    else: self.recording_status_index.notify(_id)
+                #
 
-                if (self.recordings_cache is not None):
-                    with self._lock:
-                        # Thread safety
-                        if (self.recordings_cache is not None): self.recordings_cache.append("{0}:///{1}".format(self.get_vfs_scheme(), _id))
-                    #
+                if (self.refresh_coalescer.merge(_id, message)):
+                    MemoryTasks.get_instance().add("mp.tasks.ResourcePvrRecordingTvheadendBatchRefresh",
+                                                   ResourcePvrRecordingTvheadendBatchRefresh(self.get_container(),
+                                                                                             self.get_name(),
+                                                                                             self.refresh_coalescer
+                                                                                            ),
+                                                   self.refresh_coalescer.get_debounce_time()
+                                                  )
                 #
+
+                self.recordings_registry.add(_id, "{0}:///{1}".format(self.get_vfs_scheme(), _id))
             elif (method == "dvrEntryDelete"):
                 _id = message['id']
                 resource = "{0}:///{1}".format(self.get_vfs_scheme(), _id)
 
+                if (self.recording_status_index is not None): self.recording_status_index.remove(_id)
+                if (self.segment_cache is not None): self.segment_cache.remove(_id)
+
+                self.refresh_coalescer.discard(_id)
+
                 MemoryTasks.get_instance().add("mp.tasks.ResourceDeleter.{0}".format(_id),
                                                ResourceDeleter(resource),
                                                0
                                               )
 
-                if (self.recordings_cache is not None):
-                    with self._lock:
-                        # Thread safety
-                        if (self.recordings_cache is not None
-                            and _id in self.recordings_cache
-                           ): self.recordings_cache.remove(resource)
-                    #
-                #
+                self.recordings_registry.remove(_id)
             elif (method == "initialSyncCompleted"):
-                with Connection.get_instance():
-                    container = self.get_container()
-                    children = container.get_content_list_of_type(MpEntryPvrRecording.TYPE_CDS_ITEM)
-
-                    with self._lock:
-                        for entry in children:
-                            if (isinstance(entry, MpEntryPvrRecording)):
-                                entry_data = entry.get_data_attributes("id", "vfs_url")
-
-                                if (entry_data['vfs_url'] not in self.recordings_cache):
-                                    MemoryTasks.get_instance().add("mp.tasks.ResourceDeleter.{0}".format(entry_data['id']),
-                                                                   ResourceDeleter(entry_data['vfs_url']),
-                                                                   0
-                                                                  )
-                                #
-                            #
-                        #
-                    #
-                #
-
-                with self._lock: self.recordings_cache = None
+                if (self.recording_status_index is not None): self.recording_status_index.set_synchronized()
+
+                MemoryTasks.get_instance().add("mp.tasks.ResourcePvrRecordingTvheadendReconciliation",
+                                               ResourcePvrRecordingTvheadendReconciliation(self.get_container(),
+                                                                                           self.get_vfs_scheme(),
+                                                                                           self.recordings_registry,
+                                                                                           self.segment_cache
+                                                                                          ),
+                                               0
+                                              )
             #
         #
     #
@@ -181,7 +199,18 @@ Starts the activity of this manager.
 
         Hook.register("mp.pvr.tvheadend.Client.onEvent", self._handle_event)
 
-        self.client = Client.get_instance()
+        self.client_pool = ClientPool.get_instance()
+        self.file_handle_pool = FileHandlePool.get_instance()
+
+        self.recording_status_index = RecordingStatusIndex.get_instance()
+        self.recording_status_index.clear()
+
+        self.recordings_registry.clear()
+        self.refresh_coalescer = RefreshCoalescer()
+
+        if (SegmentCache.is_enabled()): self.segment_cache = SegmentCache.get_instance()
+
+        self.client = self.client_pool.get_client(ClientPool.LANE_METADATA)
         self.client.start()
         self.client.enableAsyncMetadata()
 
@@ -204,8 +233,19 @@ Stops the activity of this manager.
         """
 
         if (self.client is not None):
-            self.client.stop()
+            self.file_handle_pool.stop()
+            self.client_pool.stop()
+
             self.client = None
+            self.client_pool = None
+            self.file_handle_pool = None
+
+            if (self.recording_status_index is not None):
+                self.recording_status_index.clear()
+                self.recording_status_index = None
+            #
+
+            self.segment_cache = None
 
             Hook.unregister("mp.pvr.tvheadend.Client.onEvent", self._handle_event)
         #
@@ -0,0 +1,576 @@
+# -*- coding: utf-8 -*-
+
+"""
+MediaProvider
+A device centric multimedia solution
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?mp;tvheadend
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+#echo(mpTvheadendVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from functools import partial
+import asyncio
+import hashlib
+import re
+import socket
+
+from dNG.data.binary import Binary
+from dNG.data.settings import Settings
+from dNG.module.named_loader import NamedLoader
+from dNG.runtime.io_exception import IOException
+from dNG.runtime.value_exception import ValueException
+
+from mp.data.pvr.tvheadend.htsbin import Htsbin
+from mp.data.pvr.tvheadend.htsmsg import Htsmsg
+
+from .event_dispatcher import EventDispatcher
+from .htsp_protocol import HtspProtocol
+
+class AsyncClient(object):
+    """
+asyncio based client for Tvheadend. API methods are available as coroutine
+functions, e.g. "await client.getEvents(channelId = 1)".
+
+:author:     direct Netware Group et al.
+:copyright:  (C) direct Netware Group - All rights reserved
+:package:    mp
+:subpackage: tvheadend
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;gpl
+             GNU General Public License 2
+    """
+
+    EPG_TIME_THRESHOLD = 5 * 60
+    """
+Seconds an EPG event may start earlier or end later than the recording
+    """
+    HTSP_VERSION = 25
+    """
+HTS protocol version
+    """
+
+    def __init__(self):
+        """
+Constructor __init__(AsyncClient)
+
+:since: v0.2.00
+        """
+
+        self.authenticated = False
+        """
+True if authenticated
+        """
+        self.auth_username = None
+        """
+Authentication username
+        """
+        self.auth_digest = None
+        """
+Authentication digest
+        """
+        self.channel_server_method_supported = False
+        """
+Tvheadend HTSP getChannel requires version 14 or newer
+        """
+        self.channels_cache = { }
+        """
+Tvheadend channels cache
+        """
+        self.event_dispatcher = EventDispatcher(drained_callback = self._on_event_dispatcher_drained)
+        """
+Bounded worker pool for async messages
+        """
+        self.listener_data = None
+        """
+Listener connection data
+        """
+        self.listener_mode = None
+        """
+Listener socket mode
+        """
+        self.log_handler = NamedLoader.get_singleton("dNG.data.logging.LogHandler", False)
+        """
+The LogHandler is called whenever debug messages should be logged or errors
+happened.
+        """
+        self.loop = None
+        """
+asyncio event loop the connection belongs to
+        """
+        self.protocol = None
+        """
+HTSP protocol instance of the connection
+        """
+        self._response_futures = { }
+        """
+Futures waiting for the response with the "seq" used as the key
+        """
+        self.seq = 0
+        """
+Sequence counter
+        """
+        self.server_name = None
+        """
+Server name
+        """
+        self.server_version = None
+        """
+Server version
+        """
+        self.server_transcoding_supported = False
+        """
+Tvheadend HTSP transcoding requires version 11 or newer
+        """
+        self._session_lock = asyncio.Lock()
+        """
+asyncio lock for connecting and authorization
+        """
+        self.timeout = 0
+        """
+Socket timeout value
+        """
+
+        self.timeout = int(Settings.get("mp_tvheadend_client_socket_data_timeout", 0))
+
+        if (self.timeout < 1): self.timeout = int(Settings.get("pas_global_client_socket_data_timeout", 0))
+        if (self.timeout < 1): self.timeout = int(Settings.get("pas_global_socket_data_timeout", 30))
+
+        listener_address = Settings.get("mp_tvheadend_listener_address", "localhost:9982")
+        listener_mode = Settings.get("mp_tvheadend_listener_mode")
+
+        self.listener_mode = (socket.AF_INET6 if (listener_mode == "ipv6") else socket.AF_INET)
+
+        re_result = re.search("^(.+):(\\d+)$", listener_address)
+        if (re_result is None): raise ValueException("Invalid configuration for Tvheadend client")
+
+        self.listener_data = ( Binary.str(re_result.group(1)), int(re_result.group(2)) )
+    #
+
+    def __getattr__(self, api_method):
+        """
+python.org: Called when an attribute lookup has not found the attribute in
+the usual places (i.e. it is not an instance attribute nor is it found in the
+class tree for self).
+
+:param api_method: API method
+
+:return: (proxymethod) API coroutine function
+:since:  v0.2.00
+        """
+
+        # HTSP method names never contain underscores
+        if ("_" in api_method): raise AttributeError(api_method)
+
+        async def proxymethod(**kwargs): return await self.call(api_method, **kwargs)
+
+        return proxymethod
+    #
+
+    async def call(self, api_method, **kwargs):
+        """
+Sends a API method call to the Tvheadend server and returns its response.
+
+:param api_method: API method
+
+:return: (dict) Parsed HTSMSG response
+:since:  v0.2.00
+        """
+
+        await self._ensure_session_established()
+        return await self._call(api_method, kwargs)
+    #
+
+    async def _call(self, api_method, params = None):
+        """
+Sends a API method call to the Tvheadend server.
+
+:param api_method: API method
+:param params: Dict with request parameters
+
+:return: (dict) Parsed HTSMSG response
+:since:  v0.2.00
+        """
+
+        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}._call({1})- (#echo(__LINE__)#)", self, api_method, context = "mp_tvheadend")
+
+        if (self.protocol is None or self.protocol.transport is None): raise IOException("Tvheadend client is not connected")
+
+        if (params is None): params = { }
+        if (self.auth_username is not None): params['username'] = self.auth_username
+        if (self.auth_digest is not None): params['digest'] = self.auth_digest
+
+        seq = self.seq
+
+        while (seq in self._response_futures):
+            seq += 1
+            if (seq > 32768): seq = 0
+        #
+
+        self.seq = seq + 1
+        if (self.seq > 32768): self.seq = 0
+
+        response_future = self.loop.create_future()
+        self._response_futures[seq] = response_future
+
+        params['method'] = api_method
+        params['seq'] = seq
+
+        try:
+            self.protocol.send_message(Htsmsg(params))
+            return await asyncio.wait_for(response_future, self.timeout)
+        except asyncio.TimeoutError as handled_exception: raise IOException("Tvheadend client timed out", _exception = handled_exception)
+        finally:
+            # The "seq" may have been reused after a reconnect
+            if (self._response_futures.get(seq) is response_future): del(self._response_futures[seq])
+        #
+    #
+
+    async def close(self):
+        """
+Closes the connection to the Tvheadend server.
+
+:since: v0.2.00
+        """
+
+        if (self.protocol is not None and self.protocol.transport is not None):
+            self.protocol.transport.close()
+        #
+
+        self._on_connection_lost(self.protocol, None)
+        self.event_dispatcher.stop()
+    #
+
+    async def connect(self):
+        """
+Connects to the Tvheadend server using the running event loop.
+
+:since: v0.2.00
+        """
+
+        async with self._session_lock: await self._connect()
+    #
+
+    async def _connect(self):
+        """
+Connects to the Tvheadend server if not already connected. The session lock
+must be held by the caller.
+
+:since: v0.2.00
+        """
+
+        if (self.protocol is None or self.protocol.transport is None):
+            self.loop = asyncio.get_running_loop()
+
+            try:
+                _, self.protocol = await asyncio.wait_for(self.loop.create_connection(partial(HtspProtocol, self._handle_message, self._on_connection_lost),
+                                                                                      self.listener_data[0],
+                                                                                      self.listener_data[1],
+                                                                                      family = self.listener_mode
+                                                                                     ),
+                                                          self.timeout
+                                                         )
+            except asyncio.TimeoutError as handled_exception: raise IOException("Tvheadend client timed out", _exception = handled_exception)
+
+            self.seq = 0
+        #
+    #
+
+    async def _ensure_session_established(self):
+        """
+Connects and authenticates this client at the Tvheadend server if required.
+
+:since: v0.2.00
+        """
+
+        if (not self.authenticated):
+            async with self._session_lock:
+                # Concurrent coroutines
+                if (not self.authenticated):
+                    await self._connect()
+
+                    response = await self._call("hello",
+                                                { "htspversion": AsyncClient.HTSP_VERSION,
+                                                  "clientname": "mp.tvheadend",
+                                                  "clientversion": "#echo(mpTvheadendVersion)#"
+                                                }
+                                               )
+
+                    if (response['htspversion'] < 8): raise IOException("Tvheadend indicated HTSP version is too old")
+
+                    self.channel_server_method_supported = (response['htspversion'] >= 14)
+                    self.server_transcoding_supported = (response['htspversion'] >= 11)
+
+                    self.server_name = response['servername']
+                    self.server_version = response['serverversion']
+
+                    self.auth_username = Settings.get("mp_tvheadend_user")
+                    password = Binary.bytes(Settings.get("mp_tvheadend_password"))
+
+                    if (self.auth_username is not None and password is not None):
+                        self.auth_digest = Htsbin(hashlib.new("sha1", password + response['challenge']).digest())
+
+                        response = await self._call("authenticate")
+                        if ("noaccess" in response): raise IOException("Tvheadend denied access")
+                    #
+
+                    self.authenticated = True
+                #
+            #
+        #
+    #
+
+    async def get_channel_name(self, _id):
+        """
+Returns the channel name for the channel with the given ID.
+
+:param _id: Channel ID
+
+:return: (str) Channel name or call sign
+:since:  v0.2.00
+        """
+
+        await self._ensure_session_established()
+
+        if (self.channel_server_method_supported): return (await self._call("getChannel", { "channelId": _id }))['channelName']
+        elif (_id not in self.channels_cache): raise ValueException("Channel ID given is invalid")
+        else: return self.channels_cache[_id]
+    #
+
+    async def get_epg_details(self, channel, start_timestamp, end_timestamp = None, title = None):
+        """
+Returns the EPG details matching the recording defined by the channel ID,
+its start and end time.
+
+:param channel: Channel ID
+:param start_timestamp: UNIX timestamp the recording starts
+:param end_timestamp: UNIX timestamp the recording ends
+:param title: Title of the recording
+
+:return: (dict) Event data
+:since:  v0.2.00
+        """
+
+        _return = None
+
+        await self._ensure_session_established()
+
+        event_id = None
+        start_timestamp_min = start_timestamp - AsyncClient.EPG_TIME_THRESHOLD
+        end_timestamp_max = (None if (end_timestamp is None) else end_timestamp + AsyncClient.EPG_TIME_THRESHOLD)
+
+        while (_return is None):
+            params = { "channelId": channel,
+                       "numFollowing": 10
+                     }
+
+            if (event_id is not None): params['eventId'] = event_id
+            if (end_timestamp_max is not None): params['maxTime'] = end_timestamp_max
+
+            events = (await self._call("getEvents", params))['events']
+
+            if (len(events) > 0 and events[0]['stop'] <= start_timestamp_min):
+                event = events[-1]
+
+                if (event['start'] < start_timestamp_min
+                    and "nextEventId" in event
+                   ): event_id = event['nextEventId']
+                else:
+                    _return = AsyncClient._get_matching_event(events, start_timestamp_min, end_timestamp_max, title)
+                    break
+                #
+            else: break
+        #
+
+        if (_return is None): raise ValueException("No EPG event matches the given criteria")
+        return _return
+    #
+
+    async def get_epg_event_details(self, event_id):
+        """
+Returns the EPG details of the event with the given ID.
+
+:param event_id: EPG event ID
+
+:return: (dict) Event data
+:since:  v0.2.00
+        """
+
+        await self._ensure_session_established()
+
+        try: return await self._call("getEvent", { "eventId": event_id })
+        except IOException as handled_exception: raise ValueException("No EPG event matched the given ID", _exception = handled_exception)
+    #
+
+    async def get_server_name(self):
+        """
+Returns the Tvheadend server name.
+
+:return: (str) Server name
+:since:  v0.2.00
+        """
+
+        await self._ensure_session_established()
+        return self.server_name
+    #
+
+    async def get_server_version(self):
+        """
+Returns the Tvheadend server version.
+
+:return: (str) Server version
+:since:  v0.2.00
+        """
+
+        await self._ensure_session_established()
+        return self.server_version
+    #
+
+    def _handle_message(self, message):
+        """
+Handles a received HTSMSG response or async message.
+
+:param message: HTSMSG instance
+
+:since: v0.2.00
+        """
+
+        if ("seq" in message):
+            response_future = self._response_futures.pop(message['seq'], None)
+
+            if (response_future is None):
+                if (self.log_handler is not None): self.log_handler.error("mp.tvheadend.AsyncClient received invalid HTSMSG seq", context = "mp_tvheadend")
+            elif (not response_future.done()):
+                if ("error" in message): response_future.set_exception(IOException("mp.tvheadend.AsyncClient received error: {0}".format(message['error'])))
+                else: response_future.set_result(message)
+            #
+        elif ("method" in message):
+            method = message['method']
+
+            if (not self.channel_server_method_supported):
+                if (method in ( "channelAdd", "channelUpdate" )):
+                    if ("channelName" in message): self.channels_cache[message['channelId']] = message['channelName']
+                elif (method == "channelDelete"): self.channels_cache.pop(message['channelId'], None)
+            #
+
+            self.event_dispatcher.dispatch(message)
+
+            if (self.event_dispatcher.is_overloaded() and self.protocol is not None and self.protocol.transport is not None):
+                self.protocol.transport.pause_reading()
+            #
+        elif (self.log_handler is not None): self.log_handler.error("mp.tvheadend.AsyncClient received async message without method", context = "mp_tvheadend")
+    #
+
+    def is_active(self):
+        """
+Returns true if the client is connected.
+
+:return: (bool) True if connected
+:since:  v0.2.00
+        """
+
+        return (self.protocol is not None and self.protocol.transport is not None)
+    #
+
+    def _on_connection_lost(self, protocol, exc):
+        """
+Called if the connection to the Tvheadend server is lost.
+
+:param protocol: HTSP protocol instance of the connection lost
+:param exc: Exception object or None
+
+:since: v0.2.00
+        """
+
+        # Ignore late callbacks of connections already replaced
+        if (protocol is not self.protocol): return
+
+        if (exc is not None and self.log_handler is not None): self.log_handler.warning("mp.tvheadend.AsyncClient reporting: Connection lost ({0!r})", exc, context = "mp_tvheadend")
+
+        self.authenticated = False
+        self.channels_cache = { }
+        self.protocol = None
+
+        response_futures = self._response_futures
+        self._response_futures = { }
+
+        for response_future in response_futures.values():
+            if (not response_future.done()): response_future.set_exception(IOException("Tvheadend client has stopped listening"))
+        #
+    #
+
+    def _on_event_dispatcher_drained(self):
+        """
+Called by a worker thread of the event dispatcher if it is no longer
+overloaded.
+
+:since: v0.2.00
+        """
+
+        if (self.loop is not None):
+            try: self.loop.call_soon_threadsafe(self._resume_reading)
+            except RuntimeError: pass
+        #
+    #
+
+    def _resume_reading(self):
+        """
+Resumes reading from the connection if the event dispatcher is not
+overloaded again.
+
+:since: v0.2.00
+        """
+
+        if ((not self.event_dispatcher.is_overloaded())
+            and self.protocol is not None
+            and self.protocol.transport is not None
+           ): self.protocol.transport.resume_reading()
+    #
+
+    @staticmethod
+    def _get_matching_event(events, start_timestamp_min, end_timestamp_max, title):
+        """
+Searches through the list of events given to find the match based on
+the given criteria.
+
+:return: (dict) Event data if found; None if not matched
+:since:  v0.2.00
+        """
+
+        _return = None
+
+        for event in events:
+            if (title is None or event['title'] == title):
+                if (event['start'] > start_timestamp_min
+                    and (end_timestamp_max is None or event['stop'] < end_timestamp_max)
+                   ):
+                    _return = event
+                    break
+                #
+            #
+        #
+
+        return _return
+    #
+#
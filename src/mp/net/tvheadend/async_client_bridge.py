@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+
+"""
+MediaProvider
+A device centric multimedia solution
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?mp;tvheadend
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+#echo(mpTvheadendVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from threading import current_thread
+import asyncio
+
+from dNG.plugins.hook import Hook
+from dNG.runtime.io_exception import IOException
+from dNG.runtime.thread import Thread
+from dNG.runtime.thread_lock import ThreadLock
+
+from .async_client import AsyncClient
+
+class AsyncClientBridge(object):
+    """
+Synchronous facade for the asyncio based Tvheadend client. The event loop
+runs in a dedicated thread and calls of other threads are bridged to it.
+
+:author:     direct Netware Group et al.
+:copyright:  (C) direct Netware Group - All rights reserved
+:package:    mp
+:subpackage: tvheadend
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;gpl
+             GNU General Public License 2
+    """
+
+    def __init__(self):
+        """
+Constructor __init__(AsyncClientBridge)
+
+:since: v0.2.00
+        """
+
+        self.client = AsyncClient()
+        """
+asyncio based Tvheadend client
+        """
+        self._lock = ThreadLock()
+        """
+Thread safety lock
+        """
+        self.loop = None
+        """
+asyncio event loop running in the bridge thread
+        """
+        self.loop_thread = None
+        """
+Thread running the event loop
+        """
+    #
+
+    def __getattr__(self, api_method):
+        """
+python.org: Called when an attribute lookup has not found the attribute in
+the usual places (i.e. it is not an instance attribute nor is it found in the
+class tree for self).
+
+:param api_method: API method
+
+:return: (proxymethod) API callable
+:since:  v0.2.00
+        """
+
+        # HTSP method names never contain underscores
+        if ("_" in api_method): raise AttributeError(api_method)
+
+        def proxymethod(**kwargs): return self._run(self.client.call(api_method, **kwargs))
+
+        return proxymethod
+    #
+
+    def call_async(self, api_method, **kwargs):
+        """
+Sends a API method call to the Tvheadend server without waiting for the
+response.
+
+:param api_method: API method
+
+:return: (object) concurrent.futures.Future resolved with the parsed HTSMSG
+         response
+:since:  v0.2.00
+        """
+
+        self.start()
+        return asyncio.run_coroutine_threadsafe(self.client.call(api_method, **kwargs), self.loop)
+    #
+
+    def get_channel_name(self, _id):
+        """
+Returns the channel name for the channel with the given ID.
+
+:param _id: Channel ID
+
+:return: (str) Channel name or call sign
+:since:  v0.2.00
+        """
+
+        return self._run(self.client.get_channel_name(_id))
+    #
+
+    def get_epg_details(self, channel, start_timestamp, end_timestamp = None, title = None):
+        """
+Returns the EPG details matching the recording defined by the channel ID,
+its start and end time.
+
+:param channel: Channel ID
+:param start_timestamp: UNIX timestamp the recording starts
+:param end_timestamp: UNIX timestamp the recording ends
+:param title: Title of the recording
+
+:return: (dict) Event data
+:since:  v0.2.00
+        """
+
+        return self._run(self.client.get_epg_details(channel, start_timestamp, end_timestamp, title))
+    #
+
+    def get_epg_event_details(self, event_id):
+        """
+Returns the EPG details of the event with the given ID.
+
+:param event_id: EPG event ID
+
+:return: (dict) Event data
+:since:  v0.2.00
+        """
+
+        return self._run(self.client.get_epg_event_details(event_id))
+    #
+
+    def get_server_name(self):
+        """
+Returns the Tvheadend server name.
+
+:return: (str) Server name
+:since:  v0.2.00
+        """
+
+        return self._run(self.client.get_server_name())
+    #
+
+    def get_server_version(self):
+        """
+Returns the Tvheadend server version.
+
+:return: (str) Server version
+:since:  v0.2.00
+        """
+
+        return self._run(self.client.get_server_version())
+    #
+
+    def is_active(self):
+        """
+Returns true if the event loop thread is running.
+
+:return: (bool) True if active
+:since:  v0.2.00
+        """
+
+        return (self.loop is not None and self.loop.is_running())
+    #
+
+    def _run(self, coroutine):
+        """
+Runs the given coroutine in the event loop thread and waits for its result.
+
+:param coroutine: Coroutine to run
+
+:return: (mixed) Coroutine result
+:since:  v0.2.00
+        """
+
+        self.start()
+
+        if (current_thread() is self.loop_thread):
+            coroutine.close()
+            raise IOException("AsyncClientBridge can not be called from its event loop thread")
+        #
+
+        future = asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+        try: return future.result(self.client.timeout)
+        except FutureTimeoutError as handled_exception:
+            future.cancel()
+            raise IOException("Tvheadend client timed out", _exception = handled_exception)
+        #
+    #
+
+    def start(self):
+        """
+Starts the event loop in a new thread.
+
+:since: v0.2.00
+        """
+
+        if (self.loop is None):
+            with self._lock:
+                # Thread safety
+                if (self.loop is None):
+                    loop = asyncio.new_event_loop()
+
+                    self.loop_thread = Thread(target = loop.run_forever)
+                    self.loop_thread.start()
+
+                    self.loop = loop
+
+                    Hook.register("dNG.pas.Status.onShutdown", self.thread_stop)
+                #
+            #
+        #
+    #
+
+    def stop(self):
+        """
+Closes the connection and stops the event loop thread.
+
+:since: v0.2.00
+        """
+
+        with self._lock:
+            if (self.loop is not None):
+                Hook.unregister("dNG.pas.Status.onShutdown", self.thread_stop)
+
+                loop = self.loop
+                loop_thread = self.loop_thread
+
+                self.loop = None
+                self.loop_thread = None
+
+                try: asyncio.run_coroutine_threadsafe(self.client.close(), loop).result(self.client.timeout)
+                finally:
+                    loop.call_soon_threadsafe(loop.stop)
+
+                    if (loop_thread is not current_thread()):
+                        loop_thread.join()
+                        loop.close()
+                    #
+                #
+            #
+        #
+    #
+
+    def thread_stop(self, params = None, last_return = None):
+        """
+Stops the running event loop by hook call.
+
+:param params: Parameter specified
+:param last_return: The return value from the last hook called.
+
+:return: (mixed) Return value
+:since:  v0.2.00
+        """
+
+        self.stop()
+        return last_return
+    #
+#
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+
+"""
+MediaProvider
+A device centric multimedia solution
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?mp;tvheadend
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+#echo(mpTvheadendVersion)#
+#echo(__FILEPATH__)#
+"""
+
+# pylint: disable=import-error,no-name-in-module
+
+from dNG.data.settings import Settings
+from dNG.module.named_loader import NamedLoader
+from dNG.runtime.thread_lock import ThreadLock
+
+class ChunkSizeController(object):
+    """
+Tunes the size of "fileRead" requests of an HTSP connection. The latency
+and throughput of completed requests are measured and the chunk size is
+adapted to transfer as much as possible within the configured target
+latency. Each change of the chunk size is logged with the measured values.
+
+:author:     direct Netware Group et al.
+:copyright:  (C) direct Netware Group - All rights reserved
+:package:    mp
+:subpackage: tvheadend
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;gpl
+             GNU General Public License 2
+    """
+
+    SMOOTHING_FACTOR = 0.25
+    """
+Weight of a new sample for the exponentially weighted moving averages
+    """
+
+    def __init__(self, min_size = None, max_size = None, target_latency = None):
+        """
+Constructor __init__(ChunkSizeController)
+
+:param min_size: Minimum chunk size in bytes
+:param max_size: Maximum chunk size in bytes
+:param target_latency: Latency in seconds a request should complete in
+
+:since: v0.2.00
+        """
+
+        if (min_size is None): min_size = int(Settings.get("mp_tvheadend_client_read_chunk_size_min", 65536))
+        if (max_size is None): max_size = int(Settings.get("mp_tvheadend_client_read_chunk_size_max", 8388608))
+        if (target_latency is None): target_latency = float(Settings.get("mp_tvheadend_client_read_target_latency", 0.25))
+
+        self.chunk_size = None
+        """
+Current chunk size in bytes
+        """
+        self.latency = None
+        """
+Measured request latency in seconds
+        """
+        self._lock = ThreadLock()
+        """
+Thread safety lock
+        """
+        self.log_handler = NamedLoader.get_singleton("dNG.data.logging.LogHandler", False)
+        """
+The LogHandler is called whenever debug messages should be logged or errors
+happened.
+        """
+        self.max_size = max(1, max_size)
+        """
+Maximum chunk size in bytes
+        """
+        self.min_size = max(1, min(min_size, self.max_size))
+        """
+Minimum chunk size in bytes
+        """
+        self.target_latency = target_latency
+        """
+Latency in seconds a request should complete in
+        """
+        self.throughput = None
+        """
+Measured throughput in bytes per second
+        """
+
+        self.chunk_size = self._get_bounded_size(int(Settings.get("pas_global_io_chunk_size_local_network", 1048576)))
+    #
+
+    def _get_bounded_size(self, size):
+        """
+Returns the given size aligned to the minimum chunk size and limited to
+the configured bounds.
+
+:param size: Chunk size in bytes
+
+:return: (int) Bounded chunk size in bytes
+:since:  v0.2.00
+        """
+
+        size = int(size) - (int(size) % self.min_size)
+        return min(self.max_size, max(self.min_size, size))
+    #
+
+    def get_chunk_size(self):
+        """
+Returns the chunk size in bytes to request.
+
+:return: (int) Chunk size in bytes
+:since:  v0.2.00
+        """
+
+        return self.chunk_size
+    #
+
+    def get_latency(self):
+        """
+Returns the measured request latency.
+
+:return: (float) Latency in seconds; None if not measured yet
+:since:  v0.2.00
+        """
+
+        return self.latency
+    #
+
+    def get_throughput(self):
+        """
+Returns the measured throughput.
+
+:return: (float) Bytes per second; None if not measured yet
+:since:  v0.2.00
+        """
+
+        return self.throughput
+    #
+
+    def record(self, size, latency, transfer_time = None):
+        """
+Records a completed "fileRead" request and adapts the chunk size.
+
+:param size: Bytes received
+:param latency: Seconds between sending the request and receiving the
+                response
+:param transfer_time: Seconds the connection spent on this response if
+                      other requests were in flight before (defaults to
+                      the latency)
+
+:since: v0.2.00
+        """
+
+        if (transfer_time is None): transfer_time = latency
+
+        is_changed = False
+
+        if (size > 0 and transfer_time > 0):
+            with self._lock:
+                self.latency = (latency
+                                if (self.latency is None) else
+                                self.latency + ChunkSizeController.SMOOTHING_FACTOR * (latency - self.latency)
+                               )
+
+                throughput = size / float(transfer_time)
+
+                self.throughput = (throughput
+                                   if (self.throughput is None) else
+                                   self.throughput + ChunkSizeController.SMOOTHING_FACTOR * (throughput - self.throughput)
+                                  )
+
+                # Change the chunk size at most by factor 2 per request to
+                # prevent oscillation caused by single outliers.
+                chunk_size = min(self.chunk_size * 2,
+                                 max(self.chunk_size / 2, self.throughput * self.target_latency)
+                                )
+
+                chunk_size = self._get_bounded_size(chunk_size)
+
+                is_changed = (chunk_size != self.chunk_size)
+                self.chunk_size = chunk_size
+
+                latency = self.latency
+                throughput = self.throughput
+            #
+        #
+
+        if (is_changed and self.log_handler is not None):
+            self.log_handler.debug("mp.tvheadend.ChunkSizeController reporting: Chunk size changed to {0:d} bytes ({1:.0f} bytes/s, {2:.3f}s latency)",
+                                   chunk_size,
+                                   throughput,
+                                   latency,
+                                   context = "mp_tvheadend"
+                                  )
+        #
+    #
+#
@@ -30,9 +30,14 @@ https://www.direct-netware.de/redirect?licenses;gpl
 #echo(__FILEPATH__)#
 """
 
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from itertools import islice
 from threading import local
-from weakref import ref, WeakValueDictionary
+from weakref import ref
+import asyncio
 import asyncore
+import errno
 import hashlib
 import re
 import socket
@@ -44,13 +49,17 @@ from dNG.module.named_loader import NamedLoader
 from dNG.plugins.hook import Hook
 from dNG.runtime.instance_lock import InstanceLock
 from dNG.runtime.io_exception import IOException
-from dNG.runtime.result_event import ResultEvent
 from dNG.runtime.thread import Thread
 from dNG.runtime.thread_lock import ThreadLock
 from dNG.runtime.value_exception import ValueException
 
 from mp.data.pvr.tvheadend.htsbin import Htsbin
 from mp.data.pvr.tvheadend.htsmsg import Htsmsg
+from mp.data.pvr.tvheadend.htsmsg_frame_parser import HtsmsgFrameParser
+
+from .chunk_size_controller import ChunkSizeController
+from .event_dispatcher import EventDispatcher
+from .loop_waker import LoopWaker
 
 class Client(asyncore.dispatcher):
     """
@@ -69,14 +78,14 @@ Client for Tvheadend.
     """
 HTS protocol version
     """
+    WRITE_QUEUE_BATCH_SIZE = 64
+    """
+Maximum number of queued messages sent with one system call
+    """
 
     _instance_lock = InstanceLock()
     """
 Thread safety lock
-    """
-    _response_waiting_events = WeakValueDictionary()
-    """
-Threads waiting for the "seq" used as the key
     """
     _weakref_instance = None
     """
@@ -117,6 +126,22 @@ Tvheadend HTSP getChannel requires version 14 or newer
         self.channels_cache = { }
         """
 Tvheadend channels cache
+        """
+        self.chunk_size_controller = ChunkSizeController()
+        """
+Adaptive "fileRead" chunk size controller of this connection
+        """
+        self.connection_generation = 0
+        """
+Counter increased each time the connection is (re)established
+        """
+        self.event_dispatcher = EventDispatcher(drained_callback = self._on_event_dispatcher_drained)
+        """
+Bounded worker pool for async messages
+        """
+        self.frame_parser = None
+        """
+Incremental HTSMSG frame parser for received data
         """
         self.listener_data = None
         """
@@ -142,6 +167,14 @@ Thread safety lock
         """
 The LogHandler is called whenever debug messages should be logged or errors
 happened.
+        """
+        self.loop_waker = None
+        """
+Dispatcher used to wake up the loop if messages are queued
+        """
+        self._response_futures = { }
+        """
+Futures waiting for the response with the "seq" used as the key
         """
         self.seq = 0
         """
@@ -167,6 +200,14 @@ Tvheadend HTSP transcoding requires version 11 or newer
         """
 Socket timeout value
         """
+        self._write_lock = ThreadLock()
+        """
+Thread safety lock for the write queue
+        """
+        self._write_queue = deque()
+        """
+Queue of encoded messages not yet sent
+        """
 
         self.timeout = int(Settings.get("mp_tvheadend_client_socket_data_timeout", 0))
 
@@ -183,6 +224,8 @@ Socket timeout value
 
         self.listener_data = ( Binary.str(re_result.group(1)), int(re_result.group(2)) )
 
+        self.frame_parser = Client._new_frame_parser()
+
         listener_socket = socket.socket(self.listener_mode, socket.SOCK_STREAM)
         listener_socket.settimeout(self.timeout)
         listener_socket.connect(self.listener_data)
@@ -220,28 +263,89 @@ Sends a API method call to the Tvheadend server.
 :since:  v0.1.00
         """
 
-        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}._call({1})- (#echo(__LINE__)#)", self, api_method, context = "mp_tvheadend")
+        return self._wait_for_and_get_response_seq(self._call_async(api_method, params))
+    #
+
+    def call_async(self, api_method, **kwargs):
+        """
+Sends a API method call to the Tvheadend server without waiting for the
+response. Any number of calls may be in flight at the same time.
+
+:param api_method: API method
+
+:return: (object) Future resolved with the parsed HTSMSG response
+:since:  v0.2.00
+        """
+
+        self._ensure_session_established()
+        return self._call_async(api_method, kwargs)
+    #
+
+    def _call_async(self, api_method, params = None):
+        """
+Queues a API method call for the Tvheadend server and returns a future for
+its response.
+
+:param api_method: API method
+:param params: Dict with request parameters
+
+:return: (object) Future resolved with the parsed HTSMSG response
+:since:  v0.2.00
+        """
+
+        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}._call_async({1})- (#echo(__LINE__)#)", self, api_method, context = "mp_tvheadend")
 
         if (params is None): params = { }
         if (self.auth_username is not None): params['username'] = self.auth_username
         if (self.auth_digest is not None): params['digest'] = self.auth_digest
 
+        _return = Future()
+
         with self._lock:
             seq = self.seq
 
-            self.seq += 1
+            while (seq in self._response_futures):
+                seq += 1
+                if (seq > 32768): seq = 0
+            #
+
+            self.seq = seq + 1
             if (self.seq > 32768): self.seq = 0
+
+            self._response_futures[seq] = _return
         #
 
         params['method'] = api_method
         params['seq'] = seq
-        message = Htsmsg(params).export()
 
-        response_waiting_event = ResultEvent()
-        with Client._instance_lock: Client._response_waiting_events[seq] = response_waiting_event
+        try: self._queue_message(Htsmsg(params).export())
+        except socket.error as handled_exception:
+            with self._lock: self._response_futures.pop(seq, None)
+            raise IOException("Tvheadend client failed to send the request", _exception = handled_exception)
+        except Exception:
+            with self._lock: self._response_futures.pop(seq, None)
+            raise
+        #
 
-        Client.send(self, message)
-        return self._wait_for_and_get_response_seq(response_waiting_event)
+        return _return
+    #
+
+    def _discard_response_future(self, response_future):
+        """
+Cancels the given response future and forgets its seq.
+
+:param response_future: Future resolved with the response
+
+:since: v0.2.00
+        """
+
+        with self._lock:
+            for seq in [ seq for seq in self._response_futures if self._response_futures[seq] is response_future ]:
+                del(self._response_futures[seq])
+            #
+        #
+
+        response_future.cancel()
     #
 
     def _ensure_session_established(self):
@@ -289,6 +393,41 @@ Checks the session and authenticates this client at the Tvheadend server.
         #
     #
 
+    def _flush_write_queue(self):
+        """
+Sends as many queued messages as the socket accepts without blocking. The
+caller has to hold the write queue lock.
+
+:since: v0.2.00
+        """
+
+        while (len(self._write_queue) > 0):
+            try:
+                sent_size = (self.socket.sendmsg(list(islice(self._write_queue, Client.WRITE_QUEUE_BATCH_SIZE)))
+                             if (hasattr(self.socket, "sendmsg")) else
+                             self.socket.send(self._write_queue[0])
+                            )
+            except socket.error as handled_exception:
+                if (handled_exception.errno in ( errno.EAGAIN, errno.EWOULDBLOCK )): break
+                raise
+            #
+
+            if (sent_size < 1): break
+
+            while (sent_size > 0):
+                data = self._write_queue[0]
+
+                if (len(data) > sent_size):
+                    self._write_queue[0] = data[sent_size:]
+                    sent_size = 0
+                else:
+                    self._write_queue.popleft()
+                    sent_size -= len(data)
+                #
+            #
+        #
+    #
+
     def get_channel_name(self, _id):
         """
 Returns the channel name for the channel with the given ID.
@@ -308,6 +447,30 @@ Returns the channel name for the channel with the given ID.
         #
     #
 
+    def get_chunk_size_controller(self):
+        """
+Returns the adaptive "fileRead" chunk size controller of this connection.
+
+:return: (object) Chunk size controller
+:since:  v0.2.00
+        """
+
+        return self.chunk_size_controller
+    #
+
+    def get_connection_generation(self):
+        """
+Returns the connection generation. It is increased each time the
+connection is (re)established so that IDs of the previous HTSP session can
+be identified as invalid.
+
+:return: (int) Connection generation
+:since:  v0.2.00
+        """
+
+        return self.connection_generation
+    #
+
     def get_epg_details(self, channel, start_timestamp, end_timestamp = None, title = None):
         """
 Returns the EPG details matching the recording defined by the channel ID,
@@ -365,6 +528,52 @@ its start and end time.
         except IOException as handled_exception: raise ValueException("No EPG event matched the given ID", _exception = handled_exception)
     #
 
+    def get_pending_requests_count(self):
+        """
+Returns the number of requests waiting for a response.
+
+:return: (int) Number of requests in flight
+:since:  v0.2.00
+        """
+
+        return len(self._response_futures)
+    #
+
+    def get_response(self, response_future):
+        """
+Waits for and returns the response of a call made with "call_async()".
+
+:param response_future: Future returned by "call_async()"
+
+:return: (dict) Parsed HTSMSG response
+:since:  v0.2.00
+        """
+
+        return self._wait_for_and_get_response_seq(response_future)
+    #
+
+    async def get_response_async(self, response_future):
+        """
+Waits for the response of a call made with "call_async()" without blocking
+the running asyncio event loop.
+
+:param response_future: Future returned by "call_async()"
+
+:return: (dict) Parsed HTSMSG response
+:since:  v0.2.00
+        """
+
+        try: _return = await asyncio.wait_for(asyncio.wrap_future(response_future), self.timeout)
+        except asyncio.TimeoutError:
+            self._discard_response_future(response_future)
+            raise IOException("Tvheadend client timed out")
+        #
+
+        if (not self.active): raise IOException("Tvheadend client has stopped listening")
+
+        return _return
+    #
+
     def get_server_name(self):
         """
 Returns the Tvheadend server name.
@@ -431,6 +640,27 @@ Called for "mp.pvr.tvheadend.Client.onEvent"
         #
     #
 
+    def _handle_message(self, message):
+        """
+Handles a received HTSMSG response or async message.
+
+:param message: HTSMSG instance
+
+:since: v0.2.00
+        """
+
+        if ("seq" in message):
+            with self._lock: response_future = self._response_futures.pop(message['seq'], None)
+            if (response_future is None): raise IOException("HTSMSG seq is invalid")
+
+            if (not response_future.cancelled()):
+                if ("error" in message): response_future.set_exception(IOException("mp.tvheadend.Client received error: {0}".format(message['error'])))
+                else: response_future.set_result(message)
+            #
+        elif ("method" in message): self.event_dispatcher.dispatch(message)
+        elif (self.log_handler is not None): self.log_handler.error("mp.tvheadend.Client received async message without method", context = "mp_tvheadend")
+    #
+
     def handle_read(self):
         """
 python.org: Called when the asynchronous loop detects that a "read()" call
@@ -439,33 +669,59 @@ on the channel's socket will succeed.
 :since: v0.1.00
         """
 
-        try:
-            message = Htsmsg.import_socket_data(self.socket)
+        # pylint: disable=broad-except
 
-            if (message is None):
-                if (self.log_handler is not None): self.log_handler.warning("mp.tvheadend.Client reporting: Socket lost - marked for reconnect", context = "mp_tvheadend")
+        try: received_size = self.frame_parser.recv_into(self.socket)
+        except socket.error as handled_exception:
+            if (handled_exception.errno in ( errno.EAGAIN, errno.EWOULDBLOCK )): return
+            received_size = 0
+        except Exception as handled_exception:
+            if (self.log_handler is not None): self.log_handler.error(handled_exception, context = "mp_tvheadend")
+            received_size = 0
+        #
+
+        if (received_size < 1):
+            if (self.log_handler is not None): self.log_handler.warning("mp.tvheadend.Client reporting: Socket lost - marked for reconnect", context = "mp_tvheadend")
+
+            self.stop()
+            self.lost_connection = True
+        else:
+            try: messages = self.frame_parser.get_messages()
+            except Exception as handled_exception:
+                if (self.log_handler is not None): self.log_handler.error(handled_exception, context = "mp_tvheadend")
 
                 self.stop()
                 self.lost_connection = True
-            elif ("seq" in message):
-                with Client._instance_lock:
-                    seq = message['seq']
 
-                    if (seq not in Client._response_waiting_events): raise IOException("HTSMSG seq is invalid")
+                messages = [ ]
+            #
 
-                    response_waiting_event = Client._response_waiting_events[seq]
-                    del(Client._response_waiting_events[seq])
+            for message in messages:
+                try: self._handle_message(message)
+                except Exception as handled_exception:
+                    if (self.log_handler is not None): self.log_handler.error(handled_exception, context = "mp_tvheadend")
                 #
+            #
+        #
+    #
+
+    def handle_write(self):
+        """
+python.org: Called when the asynchronous loop detects that a writable
+socket can be written.
+
+:since: v0.2.00
+        """
+
+        # pylint: disable=broad-except
 
-                response_waiting_event.set_result(message)
-            elif ("method" in message):
-                Thread(target = Hook.call,
-                       args = ( "mp.pvr.tvheadend.Client.onEvent", ),
-                       kwargs = { "message": message }
-                      ).start()
-            elif (self.log_handler is not None): self.log_handler.error("mp.tvheadend.Client received async message without method", context = "mp_tvheadend")
+        try:
+            with self._write_lock: self._flush_write_queue()
         except Exception as handled_exception:
             if (self.log_handler is not None): self.log_handler.error(handled_exception, context = "mp_tvheadend")
+
+            self.stop()
+            self.lost_connection = True
         #
     #
 
@@ -487,6 +743,68 @@ Returns the PVR manager status.
         return self.active
     #
 
+    def _on_event_dispatcher_drained(self):
+        """
+Called by the event dispatcher if it is no longer overloaded to resume
+reading.
+
+:since: v0.2.00
+        """
+
+        if (self.loop_waker is not None): self.loop_waker.wake_up()
+    #
+
+    def _queue_message(self, data):
+        """
+Queues the encoded message for sending. The message is sent directly if
+possible; the remaining data is sent by the dispatcher loop. The queue is
+discarded and the connection is reset if sending fails as the data sent
+may end within a message.
+
+:param data: HTSMSG encoded message
+
+:since: v0.2.00
+        """
+
+        try:
+            with self._write_lock:
+                self._write_queue.append(memoryview(data))
+
+                try:
+                    if (self.socket is not None): self._flush_write_queue()
+                except Exception:
+                    self._write_queue.clear()
+                    raise
+                #
+
+                is_data_remaining = (len(self._write_queue) > 0)
+            #
+        except Exception:
+            # The write lock must not be held while stopping
+            self.stop()
+            self.lost_connection = True
+
+            raise
+        #
+
+        if (is_data_remaining and self.loop_waker is not None): self.loop_waker.wake_up()
+
+        if (is_data_remaining and self.loop_waker is not None): self.loop_waker.wake_up()
+    #
+
+    def readable(self):
+        """
+python.org: Called each time around the asynchronous loop to determine
+whether a channel's socket should be added to the list on which read events
+can occur.
+
+:return: (bool) True unless the event dispatcher is overloaded
+:since:  v0.2.00
+        """
+
+        return (not self.event_dispatcher.is_overloaded())
+    #
+
     def start(self):
         """
 Starts the prepared dispatcher in a new thread.
@@ -503,6 +821,7 @@ Starts the prepared dispatcher in a new thread.
 
                 if (not is_already_active):
                     self.active = True
+                    self.connection_generation += 1
                     self.lost_connection = False
                 #
             #
@@ -517,6 +836,10 @@ Starts the prepared dispatcher in a new thread.
                     listener_socket.settimeout(self.timeout)
                     listener_socket.connect(self.listener_data)
 
+                    # Senders must never block while holding the write lock
+                    listener_socket.setblocking(False)
+
+                    self.frame_parser = Client._new_frame_parser()
                     self.seq = 0
                     self.set_socket(listener_socket)
                 #
@@ -541,6 +864,11 @@ Run the main loop for this dispatcher instance.
 
         try:
             self.add_channel(self.local.sockets)
+            self.loop_waker = LoopWaker(self.local.sockets)
+
+            # Messages may have been queued before the loop has been started
+            if (self.writable()): self.loop_waker.wake_up()
+
             asyncore.loop(5, map = self.local.sockets)
 
             for _socket in self.local.sockets:
@@ -578,6 +906,24 @@ Stops the listener and unqueues all running sockets.
 
                 try: self.close()
                 except Exception: pass
+
+                if (self.loop_waker is not None):
+                    try: self.loop_waker.close()
+                    except Exception: pass
+
+                    self.loop_waker = None
+                #
+
+                response_futures = self._response_futures
+                self._response_futures = { }
+
+                with self._write_lock: self._write_queue.clear()
+
+                self.event_dispatcher.stop()
+
+                for response_future in response_futures.values():
+                    if (not response_future.done()): response_future.set_exception(IOException("Tvheadend client has stopped listening"))
+                #
             #
         #
     #
@@ -597,21 +943,25 @@ Stops the running dispatcher instance by hook call.
         return last_return
     #
 
-    def _wait_for_and_get_response_seq(self, response_waiting_event):
+    def _wait_for_and_get_response_seq(self, response_future):
         """
 Waits for and returns the response.
 
+:param response_future: Future resolved with the response
+
 :return: (dict) Parsed HTSMSG response
 :since:  v0.1.00
         """
 
-        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}._receive_response()- (#echo(__LINE__)#)", self, context = "mp_tvheadend")
+        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}._wait_for_and_get_response_seq()- (#echo(__LINE__)#)", self, context = "mp_tvheadend")
 
-        if (not response_waiting_event.wait(self.timeout)): raise IOException("Tvheadend client timed out")
-        if (not self.active): raise IOException("Tvheadend client has stopped listening")
+        try: _return = response_future.result(self.timeout)
+        except FutureTimeoutError:
+            self._discard_response_future(response_future)
+            raise IOException("Tvheadend client timed out")
+        #
 
-        _return = response_waiting_event.get_result()
-        if ("error" in _return): raise IOException("mp.tvheadend.Client received error: {0}".format(_return['error']))
+        if (not self.active): raise IOException("Tvheadend client has stopped listening")
 
         return _return
     #
@@ -622,11 +972,11 @@ python.org: Called each time around the asynchronous loop to determine
 whether a channel's socket should be added to the list on which write events
 can occur.
 
-:return: (bool) Always False
+:return: (bool) True if queued messages are waiting to be sent
 :since:  v0.1.00
         """
 
-        return False
+        return (len(self._write_queue) > 0)
     #
 
     @staticmethod
@@ -675,4 +1025,20 @@ the given criteria.
 
         return _return
     #
+
+    @staticmethod
+    def _new_frame_parser():
+        """
+Returns a new HTSMSG frame parser using the configured receive buffer size
+and decoding mode.
+
+:return: (object) HtsmsgFrameParser instance
+:since:  v0.2.00
+        """
+
+        buffer_size = int(Settings.get("mp_tvheadend_client_receive_buffer_size", 65536))
+        is_lazy = Settings.get("mp_tvheadend_client_lazy_decoding", False)
+
+        return HtsmsgFrameParser(buffer_size, is_lazy)
+    #
 #
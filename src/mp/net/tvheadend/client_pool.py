@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+
+"""
+MediaProvider
+A device centric multimedia solution
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?mp;tvheadend
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+#echo(mpTvheadendVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from threading import Condition
+from weakref import ref
+
+from dNG.data.settings import Settings
+from dNG.runtime.instance_lock import InstanceLock
+from dNG.runtime.thread_lock import ThreadLock
+from dNG.runtime.value_exception import ValueException
+
+from .client import Client
+
+class ClientPool(object):
+    """
+Pool of HTSP connections routed by workload class ("lane"). Bulk file
+streaming, control and EPG RPCs and the async metadata subscription use
+separate connections so that one slow call does not delay the others.
+
+The metadata lane always uses the "Client.get_instance()" singleton. The
+number of connections of the other lanes is configurable; a size of 0
+routes the lane to the singleton as well. The pool is kept alive while it
+has dedicated connections open so that they are not leaked.
+
+:author:     direct Netware Group et al.
+:copyright:  (C) direct Netware Group - All rights reserved
+:package:    mp
+:subpackage: tvheadend
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;gpl
+             GNU General Public License 2
+    """
+
+    LANE_CONTROL = "control"
+    """
+Lane for control and EPG RPCs
+    """
+    LANE_METADATA = "metadata"
+    """
+Lane for the async metadata subscription
+    """
+    LANE_STREAM = "stream"
+    """
+Lane for bulk file streaming
+    """
+
+    _instance_lock = InstanceLock()
+    """
+Thread safety lock
+    """
+    _strong_instance = None
+    """
+ClientPool instance kept alive while dedicated clients are open
+    """
+    _weakref_instance = None
+    """
+ClientPool weakref instance
+    """
+
+    def __init__(self):
+        """
+Constructor __init__(ClientPool)
+
+:since: v0.2.00
+        """
+
+        self.clients = { ClientPool.LANE_CONTROL: [ ], ClientPool.LANE_STREAM: [ ] }
+        """
+Dedicated clients by lane
+        """
+        self.connecting = { ClientPool.LANE_CONTROL: 0, ClientPool.LANE_STREAM: 0 }
+        """
+Number of dedicated clients connecting by lane
+        """
+        self._connecting_condition = Condition()
+        """
+Condition notified if a dedicated client has finished connecting
+        """
+        self._lock = ThreadLock()
+        """
+Thread safety lock
+        """
+        self.singleton_client = None
+        """
+"Client.get_instance()" singleton if returned by this pool
+        """
+        self.sizes = { ClientPool.LANE_CONTROL: int(Settings.get("mp_tvheadend_client_pool_control_size", 1)),
+                       ClientPool.LANE_STREAM: int(Settings.get("mp_tvheadend_client_pool_stream_size", 2))
+                     }
+        """
+Maximum number of dedicated clients by lane
+        """
+    #
+
+    def get_client(self, lane = None):
+        """
+Returns the least busy client of the given lane. Additional connections
+are opened up to the configured lane size if all existing ones have
+requests in flight. Connecting does not block lookups of other threads;
+only threads without any client of the lane wait for it.
+
+:param lane: Workload lane; None for the control lane
+
+:return: (object) Client instance
+:since:  v0.2.00
+        """
+
+        if (lane is None): lane = ClientPool.LANE_CONTROL
+
+        if (lane == ClientPool.LANE_METADATA or self.sizes.get(lane, 0) < 1):
+            _return = Client.get_instance()
+            with self._lock: self.singleton_client = _return
+
+            return _return
+        #
+
+        if (lane not in self.clients): raise ValueException("Client pool lane given is invalid")
+
+        is_connecting = False
+
+        with self._connecting_condition:
+            while (True):
+                with self._lock:
+                    clients = self.clients[lane]
+                    _return = None
+
+                    for client in clients:
+                        if (_return is None
+                            or client.get_pending_requests_count() < _return.get_pending_requests_count()
+                           ): _return = client
+                    #
+
+                    if (len(clients) + self.connecting[lane] < self.sizes[lane]
+                        and (_return is None or _return.get_pending_requests_count() > 0)
+                       ):
+                        # Reserve the slot for the connection opened without the lock
+                        self.connecting[lane] += 1
+                        is_connecting = True
+                    #
+
+                    is_waiting = (_return is None and (not is_connecting) and self.connecting[lane] > 0)
+                #
+
+                if (not is_waiting): break
+                self._connecting_condition.wait()
+            #
+        #
+
+        if (is_connecting):
+            try:
+                _return = Client()
+                _return.start()
+
+                with self._lock:
+                    self.clients[lane].append(_return)
+                    ClientPool._strong_instance = self
+                #
+            finally:
+                with self._lock: self.connecting[lane] -= 1
+                with self._connecting_condition: self._connecting_condition.notify_all()
+            #
+        #
+
+        return _return
+    #
+
+    def stop(self):
+        """
+Stops all clients opened by the pool and the singleton if it has been
+returned by the pool. No new connection is opened.
+
+:since: v0.2.00
+        """
+
+        with self._lock:
+            clients = ([ ] if (self.singleton_client is None) else [ self.singleton_client ])
+            self.singleton_client = None
+
+            for lane in self.clients:
+                clients += self.clients[lane]
+                self.clients[lane] = [ ]
+            #
+
+            if (ClientPool._strong_instance is self): ClientPool._strong_instance = None
+        #
+
+        for client in clients: client.stop()
+    #
+
+    @staticmethod
+    def get_instance():
+        """
+Get the ClientPool singleton.
+
+:return: (ClientPool) Object on success
+:since:  v0.2.00
+        """
+
+        _return = None
+
+        with ClientPool._instance_lock:
+            if (ClientPool._weakref_instance is not None): _return = ClientPool._weakref_instance()
+
+            if (_return is None):
+                _return = ClientPool()
+                ClientPool._weakref_instance = ref(_return)
+            #
+        #
+
+        return _return
+    #
+#
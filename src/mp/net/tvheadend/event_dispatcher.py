@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+
+"""
+MediaProvider
+A device centric multimedia solution
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?mp;tvheadend
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+#echo(mpTvheadendVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from collections import deque
+from functools import partial
+from queue import Full, Queue
+from threading import Barrier, BrokenBarrierError
+from weakref import WeakMethod
+
+from dNG.data.settings import Settings
+from dNG.module.named_loader import NamedLoader
+from dNG.plugins.hook import Hook
+from dNG.runtime.thread import Thread
+from dNG.runtime.thread_lock import ThreadLock
+
+class EventDispatcher(object):
+    """
+Bounded worker pool calling "mp.pvr.tvheadend.Client.onEvent" for async
+HTSP messages. Messages for the same DVR entry, channel, tag or EPG event
+are always handled by the same worker and therefore in the order received.
+Messages without such a field (e.g. "initialSyncCompleted") are handled
+after all messages received before and before any received afterwards.
+
+Dispatching never blocks the caller so that responses received on the same
+connection are never delayed. Messages exceeding the queue size of a worker
+are kept in order until the worker has free queue space again. The
+connection should stop reading while the dispatcher is overloaded by too
+many of these messages. The drained callback is called as soon as reading
+may be resumed.
+
+:author:     direct Netware Group et al.
+:copyright:  (C) direct Netware Group - All rights reserved
+:package:    mp
+:subpackage: tvheadend
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;gpl
+             GNU General Public License 2
+    """
+
+    ROUTING_KEYS = ( "id", "channelId", "tagId", "eventId" )
+    """
+Message fields used to select the worker
+    """
+
+    def __init__(self, workers = None, queue_size = None, overflow_size = None, drained_callback = None):
+        """
+Constructor __init__(EventDispatcher)
+
+:param workers: Number of worker threads; None for the configured value
+:param queue_size: Maximum number of queued messages per worker; None for
+                   the configured value
+:param overflow_size: Number of messages exceeding the worker queues the
+                      dispatcher is overloaded at; None for the configured
+                      value
+:param drained_callback: Bound method called by a worker thread if the
+                         dispatcher is no longer overloaded
+
+:since: v0.2.00
+        """
+
+        if (workers is None): workers = int(Settings.get("mp_tvheadend_client_event_workers", 4))
+        if (queue_size is None): queue_size = int(Settings.get("mp_tvheadend_client_event_queue_size", 256))
+        if (overflow_size is None): overflow_size = int(Settings.get("mp_tvheadend_client_event_overflow_size", 1024))
+
+        self._drained_callback = (None if (drained_callback is None) else WeakMethod(drained_callback))
+        """
+Weak reference to the bound method called if the dispatcher is no longer
+overloaded
+        """
+        self._lock = ThreadLock()
+        """
+Thread safety lock
+        """
+        self.log_handler = NamedLoader.get_singleton("dNG.data.logging.LogHandler", False)
+        """
+The LogHandler is called whenever debug messages should be logged or errors
+happened.
+        """
+        self.overflow_size = max(1, overflow_size)
+        """
+Number of messages exceeding the worker queues the dispatcher is
+overloaded at
+        """
+        self.overflows = None
+        """
+Messages waiting for free queue space of the running workers
+        """
+        self.overloaded = False
+        """
+True while the connection should stop reading
+        """
+        self.queue_size = max(1, queue_size)
+        """
+Maximum number of queued messages per worker
+        """
+        self.queues = None
+        """
+Message queues of the running workers
+        """
+        self.workers = max(1, workers)
+        """
+Number of worker threads
+        """
+    #
+
+    def _call_drained_callback(self):
+        """
+Calls the drained callback if it is still available.
+
+:since: v0.2.00
+        """
+
+        drained_callback = (None if (self._drained_callback is None) else self._drained_callback())
+        if (drained_callback is not None): drained_callback()
+    #
+
+    def _call_hook(self, message):
+        """
+Calls the hook for the given message and logs exceptions raised.
+
+:param message: HTSMSG instance
+
+:since: v0.2.00
+        """
+
+        # pylint: disable=broad-except
+
+        try: Hook.call("mp.pvr.tvheadend.Client.onEvent", message = message)
+        except Exception as handled_exception:
+            if (self.log_handler is not None): self.log_handler.error(handled_exception, context = "mp_tvheadend")
+        #
+    #
+
+    def dispatch(self, message):
+        """
+Queues the given async message for the hook call without blocking.
+
+:param message: HTSMSG instance
+
+:return: (bool) True if queued; False if the dispatcher has been stopped
+:since:  v0.2.00
+        """
+
+        self.start()
+
+        with self._lock:
+            if (self.queues is None): return False
+
+            worker_index = self._get_worker_index(message)
+
+            if (worker_index is None):
+                # All workers wait for each other before the hook is called by
+                # one of them.
+                barrier = Barrier(self.workers, partial(self._call_hook, message))
+                for worker_index in range(self.workers): self._put(worker_index, barrier)
+            else: self._put(worker_index, message)
+        #
+
+        return True
+    #
+
+    def _get_worker_index(self, message):
+        """
+Returns the index of the worker responsible for the given message.
+
+:param message: HTSMSG instance
+
+:return: (int) Worker index; None if all workers are responsible
+:since:  v0.2.00
+        """
+
+        _return = None
+
+        for key in EventDispatcher.ROUTING_KEYS:
+            if (key in message):
+                _return = hash("{0}:{1}".format(key, message[key])) % self.workers
+                break
+            #
+        #
+
+        return _return
+    #
+
+    def is_overloaded(self):
+        """
+Returns true if the connection should stop reading until the drained
+callback is called.
+
+:return: (bool) True if overloaded
+:since:  v0.2.00
+        """
+
+        return self.overloaded
+    #
+
+    def _put(self, worker_index, item):
+        """
+Queues the given item for the worker without blocking. The lock must be
+held by the caller.
+
+:param worker_index: Worker index
+:param item: HTSMSG instance, barrier or None to stop the worker
+
+:since: v0.2.00
+        """
+
+        overflow = self.overflows[worker_index]
+
+        if (len(overflow) > 0): overflow.append(item)
+        else:
+            try: self.queues[worker_index].put_nowait(item)
+            except Full: overflow.append(item)
+        #
+
+        if ((not self.overloaded)
+            and len(overflow) > 0
+            and sum(len(worker_overflow) for worker_overflow in self.overflows) >= self.overflow_size
+           ): self.overloaded = True
+    #
+
+    def _run_worker(self, queue, overflow):
+        """
+Calls the hook for each message queued until "None" is received.
+
+:param queue: Message queue of this worker
+:param overflow: Messages waiting for free queue space of this worker
+
+:since: v0.2.00
+        """
+
+        while (True):
+            item = queue.get()
+            if (item is None): break
+
+            if (isinstance(item, Barrier)):
+                try: item.wait()
+                except BrokenBarrierError: pass
+            else: self._call_hook(item)
+
+            is_drained = False
+
+            with self._lock:
+                while (len(overflow) > 0 and (not queue.full())): queue.put_nowait(overflow.popleft())
+
+                # Reading is resumed after half of the messages are handled to
+                # not pause and resume for each message.
+                if (self.overloaded
+                    and self.overflows is not None
+                    and sum(len(worker_overflow) for worker_overflow in self.overflows) <= self.overflow_size // 2
+                   ):
+                    self.overloaded = False
+                    is_drained = True
+                #
+            #
+
+            if (is_drained): self._call_drained_callback()
+        #
+    #
+
+    def start(self):
+        """
+Starts the worker threads.
+
+:since: v0.2.00
+        """
+
+        if (self.queues is None):
+            with self._lock:
+                # Thread safety
+                if (self.queues is None):
+                    overflows = [ deque() for _ in range(self.workers) ]
+                    queues = [ Queue(self.queue_size) for _ in range(self.workers) ]
+
+                    for worker_index in range(self.workers):
+                        Thread(target = self._run_worker, args = ( queues[worker_index], overflows[worker_index] )).start()
+                    #
+
+                    self.overflows = overflows
+                    self.queues = queues
+                #
+            #
+        #
+    #
+
+    def stop(self):
+        """
+Stops the worker threads after all queued messages have been handled. It
+does not wait for the workers.
+
+:since: v0.2.00
+        """
+
+        with self._lock:
+            if (self.queues is not None):
+                for worker_index in range(self.workers): self._put(worker_index, None)
+
+                self.overflows = None
+                self.overloaded = False
+                self.queues = None
+            #
+        #
+    #
+#
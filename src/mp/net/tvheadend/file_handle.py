@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+
+"""
+MediaProvider
+A device centric multimedia solution
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?mp;tvheadend
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+#echo(mpTvheadendVersion)#
+#echo(__FILEPATH__)#
+"""
+
+# pylint: disable=import-error,no-name-in-module
+
+from time import time
+
+from dNG.data.settings import Settings
+from dNG.runtime.thread_lock import ThreadLock
+
+class FileHandle(object):
+    """
+Tvheadend file handle shared by all readers of a DVR file. Each "fileRead"
+call requests an explicit offset so that readers never depend on the
+handle position on the server.
+
+:author:     direct Netware Group et al.
+:copyright:  (C) direct Netware Group - All rights reserved
+:package:    mp
+:subpackage: tvheadend
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;gpl
+             GNU General Public License 2
+    """
+
+    def __init__(self, client, dvr_id, handle_id, stat = None, connection_generation = None):
+        """
+Constructor __init__(FileHandle)
+
+:param client: Tvheadend client the file has been opened with
+:param dvr_id: Tvheadend DVR entry ID
+:param handle_id: File ID of the opened Tvheadend file
+:param stat: "fileStat" compatible data returned by "fileOpen"
+:param connection_generation: Client connection generation "fileOpen" has
+                              been called in
+
+:since: v0.2.00
+        """
+
+        self.client = client
+        """
+Tvheadend client the file has been opened with
+        """
+        self.connection_generation = (client.get_connection_generation()
+                                      if (connection_generation is None) else
+                                      connection_generation
+                                     )
+        """
+Client connection generation the file has been opened in
+        """
+        self.dvr_id = dvr_id
+        """
+Tvheadend DVR entry ID
+        """
+        self.handle_id = handle_id
+        """
+File ID of the opened Tvheadend file
+        """
+        self.immutable = False
+        """
+True if the file will not change anymore
+        """
+        self._lock = ThreadLock()
+        """
+Thread safety lock
+        """
+        self.prefetched_read = None
+        """
+Prefetched "fileRead" request as ( offset, size, future )
+        """
+        self.references = 0
+        """
+Number of readers using this handle
+        """
+        self.released_time = None
+        """
+UNIX timestamp the last reader released this handle
+        """
+        self.stat = stat
+        """
+Cached "fileStat" result
+        """
+        self.stat_future = None
+        """
+Future of a prefetched "fileStat" request
+        """
+        self.stat_time = (0 if (stat is None) else time())
+        """
+UNIX timestamp of the cached "fileStat" result
+        """
+    #
+
+    def call_read_async(self, offset, size):
+        """
+Requests data at the given offset with a pipelined "fileRead" call.
+
+:param offset: Offset to read from
+:param size: Bytes to read
+
+:return: (object) Response future
+:since:  v0.2.00
+        """
+
+        return self.client.call_async("fileRead", id = self.handle_id, size = size, offset = offset)
+    #
+
+    def close(self):
+        """
+Closes the handle on the server.
+
+:since: v0.2.00
+        """
+
+        if (self.is_active()): self.client.fileClose(id = self.handle_id)
+    #
+
+    def get_client(self):
+        """
+Returns the Tvheadend client the file has been opened with.
+
+:return: (object) Tvheadend client
+:since:  v0.2.00
+        """
+
+        return self.client
+    #
+
+    def get_stat(self):
+        """
+Returns the "fileStat" result. The result of immutable files is only
+queried once while it is cached for "mp_tvheadend_vfs_stat_cache_ttl"
+seconds otherwise.
+
+:return: (dict) "fileStat" result
+:since:  v0.2.00
+        """
+
+        stat_future = self.stat_future
+
+        if (stat_future is not None):
+            self.stat_future = None
+
+            self.stat = self.client.get_response(stat_future)
+            self.stat_time = time()
+        #
+
+        _return = self.stat
+
+        if (_return is None
+            or ((not self.immutable)
+                and time() - self.stat_time >= float(Settings.get("mp_tvheadend_vfs_stat_cache_ttl", 2))
+               )
+           ):
+            _return = self.client.fileStat(id = self.handle_id)
+
+            self.stat = _return
+            self.stat_time = time()
+        #
+
+        return _return
+    #
+
+    def is_active(self):
+        """
+Returns true if the handle can be used. Handles opened before the client
+reconnected are invalid.
+
+:return: (bool) True if the client is active and has not reconnected
+:since:  v0.2.00
+        """
+
+        return (self.client.is_active()
+                and self.client.get_connection_generation() == self.connection_generation
+               )
+    #
+
+    def pop_prefetched_read(self, offset):
+        """
+Returns the prefetched "fileRead" request if it starts at the given offset.
+It is only returned once.
+
+:param offset: Offset to read from
+
+:return: (tuple) Requested size and response future; None if not
+         prefetched
+:since:  v0.2.00
+        """
+
+        _return = None
+
+        with self._lock:
+            if (self.prefetched_read is not None and self.prefetched_read[0] == offset):
+                _return = self.prefetched_read[1:]
+                self.prefetched_read = None
+            #
+        #
+
+        return _return
+    #
+
+    def prefetch(self, size = None):
+        """
+Requests the "fileStat" result (if not already known) and the first chunk
+of the file with pipelined calls. It does not wait for the responses.
+
+:param size: Bytes to prefetch; None for the current chunk size of the
+             client
+
+:since: v0.2.00
+        """
+
+        if (size is None): size = self.client.get_chunk_size_controller().get_chunk_size()
+
+        with self._lock:
+            if (self.stat is None and self.stat_future is None):
+                self.stat_future = self.client.call_async("fileStat", id = self.handle_id)
+            #
+
+            if (self.prefetched_read is None):
+                self.prefetched_read = ( 0, size, self.client.call_async("fileRead", id = self.handle_id, size = size, offset = 0) )
+            #
+        #
+    #
+
+    def read(self, position, size):
+        """
+Reads up to the given number of bytes at the given position. A prefetched
+request for the position is used if available.
+
+:param position: Position to read from
+:param size: Bytes to read
+
+:return: (bytes) Data
+:since:  v0.2.00
+        """
+
+        prefetched_read = self.pop_prefetched_read(position)
+
+        if (prefetched_read is None): _return = self.client.fileRead(id = self.handle_id, size = size, offset = position)['data']
+        else: _return = self.client.get_response(prefetched_read[1])['data'][:size]
+
+        return _return
+    #
+
+    def set_immutable(self, immutable = True):
+        """
+Sets if the file will not change anymore.
+
+:param immutable: True if the file will not change anymore
+
+:since: v0.2.00
+        """
+
+        if (immutable and (not self.immutable)): self.stat = None
+        self.immutable = immutable
+    #
+#
@@ -0,0 +1,401 @@
+# -*- coding: utf-8 -*-
+
+"""
+MediaProvider
+A device centric multimedia solution
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?mp;tvheadend
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+#echo(mpTvheadendVersion)#
+#echo(__FILEPATH__)#
+"""
+
+# pylint: disable=import-error,no-name-in-module
+
+from concurrent.futures import Future
+from functools import partial
+from threading import Timer
+from time import time
+from weakref import ref
+
+from dNG.data.settings import Settings
+from dNG.runtime.instance_lock import InstanceLock
+from dNG.runtime.thread_lock import ThreadLock
+
+from .client_pool import ClientPool
+from .file_handle import FileHandle
+
+class FileHandlePool(object):
+    """
+Process-wide pool of Tvheadend file handles keyed by DVR entry ID. Handles
+are reference counted and closed after they have not been used for
+"mp_tvheadend_vfs_handle_idle_timeout" seconds.
+
+:author:     direct Netware Group et al.
+:copyright:  (C) direct Netware Group - All rights reserved
+:package:    mp
+:subpackage: tvheadend
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;gpl
+             GNU General Public License 2
+    """
+
+    _instance_lock = InstanceLock()
+    """
+Thread safety lock
+    """
+    _weakref_instance = None
+    """
+FileHandlePool weakref instance
+    """
+
+    def __init__(self):
+        """
+Constructor __init__(FileHandlePool)
+
+:since: v0.2.00
+        """
+
+        self.handles = { }
+        """
+File handles by DVR entry ID
+        """
+        self.idle_timeout = float(Settings.get("mp_tvheadend_vfs_handle_idle_timeout", 30))
+        """
+Seconds an unused handle is kept open
+        """
+        self.idle_timer = None
+        """
+Timer closing idle handles
+        """
+        self._lock = ThreadLock()
+        """
+Thread safety lock
+        """
+    #
+
+    def acquire(self, dvr_id):
+        """
+Returns the file handle of the given DVR entry ID. It is opened with a
+client of the streaming lane if not already pooled.
+
+:param dvr_id: Tvheadend DVR entry ID
+
+:return: (object) File handle
+:since:  v0.2.00
+        """
+
+        dvr_id = str(dvr_id)
+        _return = self._reference_pooled_handle(dvr_id)
+
+        if (_return is None):
+            client = ClientPool.get_instance().get_client(ClientPool.LANE_STREAM)
+            connection_generation = client.get_connection_generation()
+            response = client.fileOpen(file = "/dvrfile/{0}".format(dvr_id))
+
+            _return, handle_duplicated = self._add_handle(FileHandlePool._new_handle(client, dvr_id, response, connection_generation))
+            if (handle_duplicated is not None): FileHandlePool._close_handle(handle_duplicated)
+        #
+
+        return _return
+    #
+
+    def acquire_async(self, dvr_id, prefetch = False):
+        """
+Returns a future resolved with the file handle of the given DVR entry ID.
+The calling thread does not wait for "fileOpen".
+
+:param dvr_id: Tvheadend DVR entry ID
+:param prefetch: True to request the "fileStat" result and the first
+                 chunk as soon as the handle is available
+
+:return: (object) Future resolved with the file handle
+:since:  v0.2.00
+        """
+
+        _return = Future()
+
+        dvr_id = str(dvr_id)
+        handle = self._reference_pooled_handle(dvr_id)
+
+        if (handle is None):
+            client = ClientPool.get_instance().get_client(ClientPool.LANE_STREAM)
+            connection_generation = client.get_connection_generation()
+            response_future = client.call_async("fileOpen", file = "/dvrfile/{0}".format(dvr_id))
+
+            response_future.add_done_callback(partial(self._on_file_opened,
+                                                      client,
+                                                      connection_generation,
+                                                      dvr_id,
+                                                      prefetch,
+                                                      _return
+                                                     ))
+        else:
+            if (prefetch): handle.prefetch()
+            _return.set_result(handle)
+        #
+
+        return _return
+    #
+
+    def _add_handle(self, handle):
+        """
+Adds and references a handle opened. An active handle pooled concurrently
+for the same DVR entry ID is used instead.
+
+:param handle: File handle opened
+
+:return: (tuple) File handle referenced and the duplicated one to be closed
+         or None
+:since:  v0.2.00
+        """
+
+        with self._lock:
+            _return = self.handles.get(handle.dvr_id)
+
+            if (_return is None or (not _return.is_active())):
+                _return = handle
+                handle_duplicated = None
+
+                self.handles[handle.dvr_id] = handle
+            else: handle_duplicated = handle
+
+            _return.references += 1
+            _return.released_time = None
+        #
+
+        return ( _return, handle_duplicated )
+    #
+
+    def _close_idle_handles(self):
+        """
+Closes all handles not used within the idle timeout and restarts the timer
+if unused handles remain.
+
+:since: v0.2.00
+        """
+
+        handles_closed = [ ]
+        timestamp = time()
+
+        with self._lock:
+            self.idle_timer = None
+            is_handle_unused = False
+
+            for dvr_id, handle in list(self.handles.items()):
+                if (handle.references < 1):
+                    if (timestamp - handle.released_time >= self.idle_timeout):
+                        handles_closed.append(self.handles.pop(dvr_id))
+                    else: is_handle_unused = True
+                #
+            #
+
+            if (is_handle_unused): self._start_idle_timer()
+        #
+
+        for handle in handles_closed: FileHandlePool._close_handle(handle)
+    #
+
+    def _on_file_opened(self, client, connection_generation, dvr_id, prefetch, handle_future, response_future):
+        """
+Called in the client thread after the "fileOpen" response of
+"acquire_async()" has been received.
+
+:param client: Tvheadend client the file has been opened with
+:param connection_generation: Client connection generation "fileOpen" has
+                              been called in
+:param dvr_id: Tvheadend DVR entry ID
+:param prefetch: True to prefetch the "fileStat" result and first chunk
+:param handle_future: Future to be resolved with the file handle
+:param response_future: Completed "fileOpen" response future
+
+:since: v0.2.00
+        """
+
+        if (response_future.cancelled()): handle_future.cancel()
+        else:
+            try:
+                handle, handle_duplicated = self._add_handle(FileHandlePool._new_handle(client,
+                                                                                        dvr_id,
+                                                                                        response_future.result(),
+                                                                                        connection_generation
+                                                                                       ))
+
+                # Blocking calls are not allowed in the client thread.
+                if (handle_duplicated is not None
+                    and handle_duplicated.connection_generation == client.get_connection_generation()
+                   ):
+                    client.call_async("fileClose", id = handle_duplicated.handle_id)
+                #
+                if (prefetch): handle.prefetch()
+
+                handle_future.set_result(handle)
+            except Exception as handled_exception: handle_future.set_exception(handled_exception)
+        #
+    #
+
+    def _reference_pooled_handle(self, dvr_id):
+        """
+Returns and references the active handle pooled for the given DVR entry ID.
+Handles of a previous connection generation are evicted.
+
+:param dvr_id: Tvheadend DVR entry ID
+
+:return: (object) File handle; None if not pooled
+:since:  v0.2.00
+        """
+
+        handle_closed = None
+
+        with self._lock:
+            _return = self.handles.get(dvr_id)
+
+            if (_return is not None and (not _return.is_active())):
+                handle_closed = self.handles.pop(dvr_id)
+                _return = None
+            #
+
+            if (_return is not None):
+                _return.references += 1
+                _return.released_time = None
+            #
+        #
+
+        if (handle_closed is not None): FileHandlePool._close_handle(handle_closed)
+
+        return _return
+    #
+
+    def release(self, handle):
+        """
+Releases a file handle acquired before. It is closed if it has not been
+acquired again within the idle timeout.
+
+:param handle: File handle
+
+:since: v0.2.00
+        """
+
+        with self._lock:
+            handle.references -= 1
+
+            if (handle.references < 1):
+                handle.released_time = time()
+                if (self.idle_timer is None): self._start_idle_timer()
+            #
+        #
+    #
+
+    def _start_idle_timer(self):
+        """
+Starts the timer closing idle handles.
+
+:since: v0.2.00
+        """
+
+        self.idle_timer = Timer(self.idle_timeout, self._close_idle_handles)
+        self.idle_timer.daemon = True
+        self.idle_timer.start()
+    #
+
+    def stop(self):
+        """
+Closes all pooled handles.
+
+:since: v0.2.00
+        """
+
+        with self._lock:
+            if (self.idle_timer is not None):
+                self.idle_timer.cancel()
+                self.idle_timer = None
+            #
+
+            handles = list(self.handles.values())
+            self.handles.clear()
+        #
+
+        for handle in handles: FileHandlePool._close_handle(handle)
+    #
+
+    @staticmethod
+    def _close_handle(handle):
+        """
+Closes the given handle on the server and ignores errors.
+
+:param handle: File handle
+
+:since: v0.2.00
+        """
+
+        try: handle.close()
+        except Exception: pass
+    #
+
+    @staticmethod
+    def get_instance():
+        """
+Get the FileHandlePool singleton.
+
+:return: (FileHandlePool) Object on success
+:since:  v0.2.00
+        """
+
+        _return = None
+
+        with FileHandlePool._instance_lock:
+            if (FileHandlePool._weakref_instance is not None): _return = FileHandlePool._weakref_instance()
+
+            if (_return is None):
+                _return = FileHandlePool()
+                FileHandlePool._weakref_instance = ref(_return)
+            #
+        #
+
+        return _return
+    #
+
+    @staticmethod
+    def _new_handle(client, dvr_id, response, connection_generation):
+        """
+Returns a file handle for the given "fileOpen" response. The size and
+modification time are cached if contained.
+
+:param client: Tvheadend client the file has been opened with
+:param dvr_id: Tvheadend DVR entry ID
+:param response: "fileOpen" response
+:param connection_generation: Client connection generation "fileOpen" has
+                              been called in
+
+:return: (object) File handle
+:since:  v0.2.00
+        """
+
+        stat = ({ "size": response['size'], "mtime": response['mtime'] }
+                if ("size" in response and "mtime" in response) else
+                None
+               )
+
+        return FileHandle(client, dvr_id, response['id'], stat, connection_generation)
+    #
+#
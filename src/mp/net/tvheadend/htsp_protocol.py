@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+"""
+MediaProvider
+A device centric multimedia solution
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?mp;tvheadend
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+#echo(mpTvheadendVersion)#
+#echo(__FILEPATH__)#
+"""
+
+import asyncio
+
+from dNG.data.settings import Settings
+
+from mp.data.pvr.tvheadend.htsmsg_frame_parser import HtsmsgFrameParser
+
+class HtspProtocol(asyncio.Protocol):
+    """
+asyncio protocol framing HTSMSG messages of a HTSP connection.
+
+:author:     direct Netware Group et al.
+:copyright:  (C) direct Netware Group - All rights reserved
+:package:    mp
+:subpackage: tvheadend
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;gpl
+             GNU General Public License 2
+    """
+
+    def __init__(self, message_callback, connection_lost_callback = None):
+        """
+Constructor __init__(HtspProtocol)
+
+:param message_callback: Callable called with each received message
+:param connection_lost_callback: Callable called with this protocol and
+                                 the exception (or None) if the connection
+                                 is lost
+
+:since: v0.2.00
+        """
+
+        asyncio.Protocol.__init__(self)
+
+        self.connection_lost_callback = connection_lost_callback
+        """
+Callable called if the connection is lost
+        """
+        self.frame_parser = HtsmsgFrameParser(int(Settings.get("mp_tvheadend_client_receive_buffer_size", 65536)),
+                                              Settings.get("mp_tvheadend_client_lazy_decoding", False)
+                                             )
+        """
+Incremental HTSMSG frame parser for received data
+        """
+        self.message_callback = message_callback
+        """
+Callable called with each received message
+        """
+        self.transport = None
+        """
+asyncio transport of the connection
+        """
+    #
+
+    def connection_lost(self, exc):
+        """
+python.org: Called when the connection is lost or closed.
+
+:param exc: Exception object or None
+
+:since: v0.2.00
+        """
+
+        self.transport = None
+        if (self.connection_lost_callback is not None): self.connection_lost_callback(self, exc)
+    #
+
+    def connection_made(self, transport):
+        """
+python.org: Called when a connection is made.
+
+:param transport: asyncio transport of the connection
+
+:since: v0.2.00
+        """
+
+        self.transport = transport
+    #
+
+    def data_received(self, data):
+        """
+python.org: Called when some data is received.
+
+:param data: Received data
+
+:since: v0.2.00
+        """
+
+        self.frame_parser.feed(data)
+        for message in self.frame_parser.get_messages(): self.message_callback(message)
+    #
+
+    def send_message(self, message):
+        """
+Sends the given HTSMSG message. asyncio buffers the data if the socket
+is not writable.
+
+:param message: HTSMSG instance
+
+:since: v0.2.00
+        """
+
+        self.transport.write(message.export())
+    #
+#
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+"""
+MediaProvider
+A device centric multimedia solution
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?mp;tvheadend
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+#echo(mpTvheadendVersion)#
+#echo(__FILEPATH__)#
+"""
+
+import asyncore
+import socket
+
+from dNG.data.binary import Binary
+
+class LoopWaker(asyncore.dispatcher):
+    """
+Socket pair based dispatcher used to interrupt a blocking "select()" call
+of an asyncore loop from another thread.
+
+:author:     direct Netware Group et al.
+:copyright:  (C) direct Netware Group - All rights reserved
+:package:    mp
+:subpackage: tvheadend
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;gpl
+             GNU General Public License 2
+    """
+
+    BINARY_WAKE_UP_BYTE = Binary.bytes("\x00")
+    """
+Byte written to wake up the loop
+    """
+
+    def __init__(self, _map = None):
+        """
+Constructor __init__(LoopWaker)
+
+:param _map: asyncore socket map to add this dispatcher to
+
+:since: v0.2.00
+        """
+
+        reader_socket, writer_socket = socket.socketpair()
+
+        self.writer_socket = writer_socket
+        """
+Socket written to for waking up the loop
+        """
+
+        self.writer_socket.setblocking(False)
+
+        asyncore.dispatcher.__init__(self, sock = reader_socket, map = _map)
+    #
+
+    def close(self):
+        """
+python.org: Close the socket.
+
+:since: v0.2.00
+        """
+
+        asyncore.dispatcher.close(self)
+
+        try: self.writer_socket.close()
+        except socket.error: pass
+    #
+
+    def handle_close(self):
+        """
+python.org: Called when the socket is closed.
+
+:since: v0.2.00
+        """
+
+        self.close()
+    #
+
+    def handle_read(self):
+        """
+python.org: Called when the asynchronous loop detects that a "read()" call
+on the channel's socket will succeed.
+
+:since: v0.2.00
+        """
+
+        self.recv(4096)
+    #
+
+    def wake_up(self):
+        """
+Wakes up the loop this dispatcher is part of.
+
+:since: v0.2.00
+        """
+
+        try: self.writer_socket.send(LoopWaker.BINARY_WAKE_UP_BYTE)
+        except socket.error: pass
+    #
+
+    def writable(self):
+        """
+python.org: Called each time around the asynchronous loop to determine
+whether a channel's socket should be added to the list on which write events
+can occur.
+
+:return: (bool) Always False
+:since:  v0.2.00
+        """
+
+        return False
+    #
+#
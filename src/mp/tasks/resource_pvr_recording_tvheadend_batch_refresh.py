@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+
+"""
+MediaProvider
+A device centric multimedia solution
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?mp;tvheadend
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+#echo(mpTvheadendVersion)#
+#echo(__FILEPATH__)#
+"""
+
+# pylint: disable=import-error,no-name-in-module
+
+from dNG.data.logging.log_line import LogLine
+from dNG.data.settings import Settings
+from dNG.data.upnp.resources.mp_entry_pvr_recording import MpEntryPvrRecording
+from dNG.database.connection import Connection
+from dNG.database.instances.mp_upnp_resource import MpUpnpResource as _DbMpUpnpResource
+from dNG.database.transaction_context import TransactionContext
+from dNG.tasks.abstract_lrt_hook import AbstractLrtHook
+
+from .resource_pvr_recording_tvheadend_refresh import ResourcePvrRecordingTvheadendRefresh
+
+class ResourcePvrRecordingTvheadendBatchRefresh(AbstractLrtHook):
+    """
+"ResourcePvrRecordingTvheadendBatchRefresh" refreshes all recordings of the
+merged TvHeadend messages pending. Existing entries of a batch are loaded
+with a single query and all inserts and updates of a batch are written in
+one transaction.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    mp
+:subpackage: tvheadend
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;gpl
+             GNU General Public License 2
+    """
+
+    def __init__(self, upnp_container, recorder_name, refresh_coalescer):
+        """
+Constructor __init__(ResourcePvrRecordingTvheadendBatchRefresh)
+
+:param upnp_container: UPnP container resource
+:param recorder_name: TvHeadend recorder name
+:param refresh_coalescer: Coalescer providing the merged messages at
+                          execution time
+
+:since: v0.2.00
+        """
+
+        AbstractLrtHook.__init__(self)
+
+        self.recorder_name = recorder_name
+        """
+TvHeadend recorder name
+        """
+        self.refresh_coalescer = refresh_coalescer
+        """
+Coalescer providing the merged messages at execution time
+        """
+        self.upnp_container = upnp_container
+        """
+UPnP container resource
+        """
+
+        self.context_id = "mp.tasks.ResourcePvrRecordingTvheadendBatchRefresh"
+    #
+
+    def _load_entries(self, vfs_urls):
+        """
+Loads the entries stored for the given VFS URLs with a single query.
+
+:param vfs_urls: VFS URLs
+
+:return: (dict) MpEntryPvrRecording instances by VFS URL
+:since:  v0.2.00
+        """
+
+        db_query = Connection.get_instance().query(_DbMpUpnpResource)
+        db_query = db_query.filter(_DbMpUpnpResource.vfs_url.in_(vfs_urls))
+
+        return { db_instance.vfs_url: MpEntryPvrRecording(db_instance) for db_instance in db_query }
+    #
+
+    def _refresh_batch(self, refresh_tasks, recording_details_list):
+        """
+Refreshes the entries of the given refresh tasks in one transaction.
+
+:param refresh_tasks: ResourcePvrRecordingTvheadendRefresh instances
+:param recording_details_list: Recording details for each refresh task
+
+:return: (list) Resource IDs of the entries to refresh the metadata of
+:since:  v0.2.00
+        """
+
+        _return = [ ]
+
+        with TransactionContext():
+            entries = self._load_entries([ refresh_task.get_vfs_url() for refresh_task in refresh_tasks ])
+
+            for refresh_task, recording_details in zip(refresh_tasks, recording_details_list):
+                entry_id = refresh_task.refresh(entries.get(refresh_task.get_vfs_url()), recording_details)
+                if (entry_id is not None): _return.append(entry_id)
+            #
+        #
+
+        return _return
+    #
+
+    def _refresh_individually(self, refresh_tasks, recording_details_list):
+        """
+Refreshes the entries of the given refresh tasks in a transaction each.
+Failures are logged and only affect the entry concerned.
+
+:param refresh_tasks: ResourcePvrRecordingTvheadendRefresh instances
+:param recording_details_list: Recording details for each refresh task
+
+:return: (list) Resource IDs of the entries to refresh the metadata of
+:since:  v0.2.00
+        """
+
+        # pylint: disable=broad-except
+
+        _return = [ ]
+
+        for refresh_task, recording_details in zip(refresh_tasks, recording_details_list):
+            try:
+                entry_id = refresh_task.refresh_stored_entry(recording_details)
+                if (entry_id is not None): _return.append(entry_id)
+            except Exception as handled_exception: LogLine.error(handled_exception, context = "mp_tvheadend")
+        #
+
+        return _return
+    #
+
+    @Connection.wrap_callable
+    def _run_hook(self):
+        """
+Hook execution
+
+:since: v0.2.00
+        """
+
+        # pylint: disable=broad-except
+
+        batch_size = max(1, int(Settings.get("mp_tvheadend_refresh_batch_size", 100)))
+        messages = self.refresh_coalescer.pop_all()
+
+        for position in range(0, len(messages), batch_size):
+            refresh_tasks = [ ResourcePvrRecordingTvheadendRefresh(self.upnp_container, message, self.recorder_name)
+                              for message in messages[position:position + batch_size]
+                            ]
+
+            # EPG details are requested before the transaction is started.
+            recording_details_list = [ ]
+
+            for refresh_task in refresh_tasks:
+                try: recording_details = refresh_task.load_recording_details()
+                except Exception as handled_exception:
+                    LogLine.error(handled_exception, context = "mp_tvheadend")
+                    recording_details = None
+                #
+
+                recording_details_list.append(recording_details)
+            #
+
+            try: entry_ids = self._refresh_batch(refresh_tasks, recording_details_list)
+            except Exception as handled_exception:
+                LogLine.warning("mp.tasks.ResourcePvrRecordingTvheadendBatchRefresh retries the batch entry by entry after: {0!r}",
+                                handled_exception,
+                                context = "mp_tvheadend"
+                               )
+
+                entry_ids = self._refresh_individually(refresh_tasks, recording_details_list)
+            #
+
+            for entry_id in entry_ids: ResourcePvrRecordingTvheadendRefresh.schedule_metadata_refresh(entry_id)
+        #
+    #
+#
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+
+"""
+MediaProvider
+A device centric multimedia solution
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?mp;tvheadend
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+#echo(mpTvheadendVersion)#
+#echo(__FILEPATH__)#
+"""
+
+# pylint: disable=import-error,no-name-in-module
+
+from dNG.data.settings import Settings
+from dNG.database.connection import Connection
+from dNG.database.instances.mp_upnp_resource import MpUpnpResource as _DbMpUpnpResource
+from dNG.database.transaction_context import TransactionContext
+from dNG.tasks.abstract_lrt_hook import AbstractLrtHook
+
+from .resource_deleter import ResourceDeleter
+
+class ResourcePvrRecordingTvheadendReconciliation(AbstractLrtHook):
+    """
+"ResourcePvrRecordingTvheadendReconciliation" deletes all recordings of
+the UPnP container not announced by the Tvheadend server during the
+initial synchronization. Stale entries are deleted in transactions of
+"mp_tvheadend_reconciliation_batch_size" entries.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    mp
+:subpackage: tvheadend
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;gpl
+             GNU General Public License 2
+    """
+
+    def __init__(self, upnp_container, vfs_scheme, recordings_registry, segment_cache = None):
+        """
+Constructor __init__(ResourcePvrRecordingTvheadendReconciliation)
+
+:param upnp_container: UPnP container resource
+:param vfs_scheme: VFS scheme of the Tvheadend recordings
+:param recordings_registry: Registry of the recordings announced
+:param segment_cache: Segment cache to remove stale recordings from
+
+:since: v0.2.00
+        """
+
+        AbstractLrtHook.__init__(self)
+
+        self.recordings_registry = recordings_registry
+        """
+Registry of the recordings announced
+        """
+        self.segment_cache = segment_cache
+        """
+Segment cache to remove stale recordings from
+        """
+        self.upnp_container = upnp_container
+        """
+UPnP container resource
+        """
+        self.vfs_scheme = vfs_scheme
+        """
+VFS scheme of the Tvheadend recordings
+        """
+
+        self.context_id = "mp.tasks.ResourcePvrRecordingTvheadendReconciliation"
+    #
+
+    def _get_vfs_urls(self):
+        """
+Returns the VFS URLs of all recordings of the UPnP container with a single
+query for the VFS URL column.
+
+:return: (list) VFS URLs
+:since:  v0.2.00
+        """
+
+        db_query = Connection.get_instance().query(_DbMpUpnpResource.vfs_url)
+        db_query = db_query.filter(_DbMpUpnpResource.id_parent == self.upnp_container.get_id())
+        db_query = db_query.filter(_DbMpUpnpResource.vfs_url.like("{0}:///_%".format(self.vfs_scheme)))
+
+        return [ vfs_url for vfs_url, in db_query ]
+    #
+
+    @Connection.wrap_callable
+    def _run_hook(self):
+        """
+Hook execution
+
+:since: v0.2.00
+        """
+
+        batch_size = max(1, int(Settings.get("mp_tvheadend_reconciliation_batch_size", 100)))
+        vfs_url_prefix = "{0}:///".format(self.vfs_scheme)
+        vfs_urls = self.recordings_registry.get_unregistered_vfs_urls(self._get_vfs_urls())
+
+        for position in range(0, len(vfs_urls), batch_size):
+            with TransactionContext():
+                # A recording may have been announced again in the meantime.
+                for vfs_url in self.recordings_registry.get_unregistered_vfs_urls(vfs_urls[position:position + batch_size]):
+                    # Dependent resources and files are cleaned up by the deleter.
+                    ResourceDeleter(vfs_url).run()
+
+                    if (self.segment_cache is not None): self.segment_cache.remove(vfs_url[len(vfs_url_prefix):])
+                #
+            #
+        #
+    #
+#
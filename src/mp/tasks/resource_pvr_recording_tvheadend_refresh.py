@@ -42,7 +42,7 @@ from dNG.plugins.hook import Hook
 from dNG.runtime.value_exception import ValueException
 from dNG.tasks.abstract_lrt_hook import AbstractLrtHook
 
-from mp.net.tvheadend.client import Client
+from mp.net.tvheadend.client_pool import ClientPool
 
 from .resource_metadata_refresh import ResourceMetadataRefresh
 
@@ -64,6 +64,10 @@ resource's metadata based on the TvHeadend message.
         """
 Constructor __init__(ResourcePvrRecordingTvheadendRefresh)
 
+:param upnp_container: UPnP container resource
+:param message: TvHeadend message
+:param recorder_name: TvHeadend recorder name
+
 :since: v0.1.00
         """
 
@@ -100,14 +104,14 @@ Returns EPG details for the recording identified by the given HTSP message.
         if (("stop" not in self.message or self.message['stop'] >= time())
             and "eventId" in self.message
            ):
-            client = Client.get_instance()
+            client = ClientPool.get_instance().get_client(ClientPool.LANE_CONTROL)
 
             try: _return = client.get_epg_event_details(self.message['eventId'])
             except ValueException: pass
         #
 
         if (_return is None and "channel" in self.message and "start" in self.message and "stop" in self.message):
-            if (client is None): client = Client.get_instance()
+            if (client is None): client = ClientPool.get_instance().get_client(ClientPool.LANE_CONTROL)
 
             try:
                 _return = client.get_epg_details(self.message['channel'],
@@ -121,6 +125,35 @@ Returns EPG details for the recording identified by the given HTSP message.
         return _return
     #
 
+    def get_vfs_url(self):
+        """
+Returns the VFS URL of the recording identified by the HTSP message.
+
+:return: (str) VFS URL
+:since:  v0.2.00
+        """
+
+        return "x-tvheadend:///{0}".format(self.message['id'])
+    #
+
+    def load_recording_details(self):
+        """
+Returns the recording details contained in the HTSP message or requested
+from the EPG otherwise.
+
+:return: (dict) Recording details; None if unknown
+:since:  v0.2.00
+        """
+
+        return (self.message
+                if ("description" in self.message
+                    or "subtitle" in self.message
+                    or "summary" in self.message
+                   ) else
+                self._get_recording_details()
+               )
+    #
+
     def _process_recording_details(self, recording_details):
         """
 Processes recording details and builds the internal title used for sorting.
@@ -138,7 +171,8 @@ Processes recording details and builds the internal title used for sorting.
         #
 
         if (_return is None and "title" in recording_details):
-            _return = recording_details
+            # The HTSP message may be processed again if a refresh is retried.
+            _return = dict(recording_details)
 
             if ("subtitle" in recording_details):
                 _return['title'] = "{0} - {1}".format(recording_details['title'],
@@ -152,37 +186,71 @@ Processes recording details and builds the internal title used for sorting.
         return _return
     #
 
-    @Connection.wrap_callable
-    def _run_hook(self):
+    def refresh(self, entry, recording_details):
         """
-Hook execution
+Refreshes the given entry or adds a new one if None. The caller is
+responsible for the surrounding database transaction and for scheduling
+the metadata refresh after it has been committed.
 
-:since: v0.1.00
+:param entry: MpEntryPvrRecording instance; None if not yet stored
+:param recording_details: Recording details returned by
+                          "load_recording_details()"
+
+:return: (str) Resource ID of the entry to refresh the metadata of; None
+         if not refreshable or unchanged
+:since:  v0.2.00
         """
 
-        _id = self.message['id']
         entry_id = None
         is_refreshable = False
-        recording_details = None
-        recording_status = ResourcePvrRecordingTvheadendRefresh._get_recording_status(self.message)
-        vfs_url = "x-tvheadend:///{0}".format(_id)
-
-        try:
-            recording_details = (self.message
-                                 if ("description" in self.message
-                                     or "subtitle" in self.message
-                                     or "summary" in self.message
-                                    ) else
-                                 self._get_recording_details()
-                                )
-
-            entry = MpEntryPvrRecording.load_resource(vfs_url)
+        recording_status = ResourcePvrRecordingTvheadendRefresh.get_recording_status(self.message)
+
+        if (entry is None):
+            is_refreshable = (recording_status == MpEntryPvrRecording.RECORDING_STATUS_FINISHED)
+
+            if (recording_details is None): recording_details = self.message
+            recording_details = self._process_recording_details(recording_details)
+
+            if (recording_details is None): raise ValueException("Title of the recording '{0}' is unknown".format(self.get_vfs_url()))
+
+            entry = MpEntryPvrRecording()
+
+            entry_data = { "title": recording_details['title'],
+                           "vfs_url": self.get_vfs_url(),
+                           "resource_title": recording_details['resource_title'],
+                           "refreshable": is_refreshable,
+                           "duration": (self.message['stop'] - self.message['start']),
+                           "series": recording_details.get("series"),
+                           "summary": recording_details.get("summary"),
+                           "description": recording_details.get("description"),
+                           "time_started": self.message['start'],
+                           "time_finished": self.message['stop'],
+                           "recorder": self.recorder_name
+                         }
+
+            if ("channel" in self.message):
+                # Channel names of old servers are only known to the async metadata connection
+                client = ClientPool.get_instance().get_client(ClientPool.LANE_METADATA)
+                entry_data['channel'] = client.get_channel_name(self.message['channel'])
+            #
+
+            entry.set_data_attributes(**entry_data)
+            entry.set_recording_status(recording_status)
+
+            self.upnp_container.add_entry(entry)
+
+            entry.save()
+
+            entry_id = entry.get_resource_id()
+        else:
             entry_id = entry.get_resource_id()
 
             entry_data = entry.get_data_attributes("refreshable", "recording_status")
             is_refreshable = (recording_status == MpEntryPvrRecording.RECORDING_STATUS_FINISHED)
 
-            if (recording_status != entry_data['recording_status']): entry.set_recording_status(recording_status)
+            is_recording_status_changed = (recording_status != entry_data['recording_status'])
+
+            if (is_recording_status_changed): entry.set_recording_status(recording_status)
             elif (not entry_data['refreshable']): is_refreshable = False
 
             entry_data = { }
@@ -199,9 +267,9 @@ Hook execution
                 entry_data['time_finished'] = self.message['stop']
             #
 
-            if (recording_details is not None):
-                recording_details = self._process_recording_details(recording_details)
+            if (recording_details is not None): recording_details = self._process_recording_details(recording_details)
 
+            if (recording_details is not None):
                 if ("title" in recording_details): entry_data['title'] = recording_details['title']
                 if ("resource_title" in recording_details): entry_data['resource_title'] = recording_details['resource_title']
                 if ("series" in recording_details): entry_data['series'] = recording_details['series']
@@ -213,59 +281,62 @@ Hook execution
             #
 
             if (len(entry_data) > 0):
-                entry.set_data_attributes(**entry_data)
-                entry.save()
+                stored_entry_data = entry.get_data_attributes(*entry_data.keys())
+
+                entry_data = { key: value
+                               for key, value in entry_data.items()
+                               if (stored_entry_data.get(key) != value)
+                             }
             #
-        except NothingMatchedException:
-            is_refreshable = (recording_status == MpEntryPvrRecording.RECORDING_STATUS_FINISHED)
 
-            if (recording_details is None): recording_details = self.message
-            recording_details = self._process_recording_details(recording_details)
+            if (len(entry_data) > 0): entry.set_data_attributes(**entry_data)
 
-            entry = MpEntryPvrRecording()
+            if (is_recording_status_changed or len(entry_data) > 0): entry.save()
+            else: is_refreshable = False
+        #
 
-            entry_data = { "title": recording_details['title'],
-                           "vfs_url": vfs_url,
-                           "resource_title": recording_details['resource_title'],
-                           "refreshable": is_refreshable,
-                           "duration": (self.message['stop'] - self.message['start']),
-                           "series": recording_details.get("series"),
-                           "summary": recording_details.get("summary"),
-                           "description": recording_details.get("description"),
-                           "time_started": self.message['start'],
-                           "time_finished": self.message['stop'],
-                           "recorder": self.recorder_name
-                         }
+        entry.close()
 
-            if ("channel" in self.message):
-                client = Client.get_instance()
-                entry_data['channel'] = client.get_channel_name(self.message['channel'])
-            #
+        return (entry_id if (is_refreshable) else None)
+    #
+
+    def refresh_stored_entry(self, recording_details):
+        """
+Loads the stored entry and refreshes it or adds a new one in a transaction
+of its own.
 
-            with TransactionContext():
-                entry.set_data_attributes(**entry_data)
-                entry.set_recording_status(recording_status)
+:param recording_details: Recording details returned by
+                          "load_recording_details()"
 
-                self.upnp_container.add_entry(entry)
+:return: (str) Resource ID of the entry to refresh the metadata of; None
+         if not refreshable or unchanged
+:since:  v0.2.00
+        """
 
-                entry.save()
-            #
+        with TransactionContext():
+            try: entry = MpEntryPvrRecording.load_resource(self.get_vfs_url())
+            except NothingMatchedException: entry = None
 
-            entry_id = entry.get_resource_id()
+            _return = self.refresh(entry, recording_details)
         #
 
-        entry.close()
+        return _return
+    #
 
-        if (is_refreshable):
-            MemoryTasks.get_instance().add("mp.tasks.ResourceMetadataRefresh.{0}".format(entry_id),
-                                           ResourceMetadataRefresh(entry_id),
-                                           1
-                                          )
-        #
+    @Connection.wrap_callable
+    def _run_hook(self):
+        """
+Hook execution
+
+:since: v0.1.00
+        """
+
+        entry_id = self.refresh_stored_entry(self.load_recording_details())
+        if (entry_id is not None): ResourcePvrRecordingTvheadendRefresh.schedule_metadata_refresh(entry_id)
     #
 
     @staticmethod
-    def _get_recording_status(message):
+    def get_recording_status(message):
         """
 Returns the recording status identified by the given HTSP message.
 
@@ -284,4 +355,21 @@ Returns the recording status identified by the given HTSP message.
 
         return _return
     #
+
+    @staticmethod
+    def schedule_metadata_refresh(entry_id):
+        """
+Schedules the metadata refresh of the given resource. It should be called
+after the transaction storing the entry has been committed.
+
+:param entry_id: Resource ID
+
+:since: v0.2.00
+        """
+
+        MemoryTasks.get_instance().add("mp.tasks.ResourceMetadataRefresh.{0}".format(entry_id),
+                                       ResourceMetadataRefresh(entry_id),
+                                       1
+                                      )
+    #
 #